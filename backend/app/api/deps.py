@@ -1,5 +1,7 @@
+import threading
+import time
 from collections.abc import Generator
-from typing import Annotated
+from typing import Annotated, Any
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -10,7 +12,7 @@ from sqlmodel import Session
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import SessionLocal
 from app.models import TokenPayload, UserDB, UserRole, UserStatus
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/user-login")
@@ -18,7 +20,7 @@ reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/user-log
 
 def get_db() -> Generator[Session]:
     """Dependency that provides a SQLAlchemy session."""
-    with Session(engine) as session:
+    with SessionLocal() as session:
         yield session
 
 
@@ -29,17 +31,104 @@ SessionDep = Annotated[Session, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> UserDB:
-    """Get the current user from the token, ensuring they are active."""
+# Decoder state built once instead of per request: a reusable PyJWT instance, the
+# allowed algorithms, the required claims and the HMAC key as bytes
+_jwt = jwt.PyJWT()
+_JWT_ALGORITHMS = [security.ALGORITHM]
+_JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+_JWT_KEY = settings.SECRET_KEY.encode()
+
+
+# Decoded token cache: raw token -> (payload, exp). Entries are only created after a
+# full signature check and are served until the token's own `exp` claim.
+_TOKEN_CACHE_MAXSIZE = 4096
+_token_cache: dict[str, tuple[TokenPayload, float]] = {}
+_token_cache_lock = threading.Lock()
+
+
+def _decode_token(token: str) -> TokenPayload:
+    """Decode and verify a JWT, memoizing the payload until the token expires."""
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached is not None:
+            if cached[1] > now:
+                return cached[0]
+            del _token_cache[token]
+
+    payload = _jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS)
+    token_data = TokenPayload(**payload)
+    exp = payload.get("exp")
+    if isinstance(exp, int | float):
+        with _token_cache_lock:
+            if len(_token_cache) >= _TOKEN_CACHE_MAXSIZE:
+                # Drop expired entries first, then the oldest insertion if still full
+                for key in [k for k, (_, e) in _token_cache.items() if e <= now]:
+                    del _token_cache[key]
+                if len(_token_cache) >= _TOKEN_CACHE_MAXSIZE:
+                    del _token_cache[next(iter(_token_cache))]
+            _token_cache[token] = (token_data, float(exp))
+    return token_data
+
+
+# Authenticated user cache: user id -> (column snapshot, expires_at). Hits and misses both
+# hand out a fresh transient UserDB built from the snapshot, so CurrentUser always behaves
+# the same (detached, never session-bound) and no ORM instance is shared between requests.
+# invalidate_cached_user() only reaches the current process: in a multi-worker deployment
+# a status/role change (e.g. an admin locking a user) takes effect in the other workers
+# once the entry expires, so staleness is bounded by _USER_CACHE_TTL_SECONDS.
+_USER_CACHE_TTL_SECONDS = 10
+_USER_CACHE_MAXSIZE = 10_000
+_user_cache: dict[int, tuple[dict[str, Any], float]] = {}
+_user_cache_lock = threading.Lock()
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Drop a cached user so the next request in this process reloads it from the DB."""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def _load_user(session: Session, user_id: int) -> UserDB | None:
+    """Fetch a user by id, serving recent lookups from the in-process cache."""
+    now = time.time()
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+        if cached is not None and cached[1] <= now:
+            del _user_cache[user_id]
+            cached = None
+    if cached is not None:
+        return UserDB.model_validate(cached[0])
+
+    user = session.get(UserDB, user_id)
+    if user is None:
+        return None
+    snapshot = user.model_dump()
+    with _user_cache_lock:
+        if len(_user_cache) >= _USER_CACHE_MAXSIZE:
+            for key in [k for k, (_, e) in _user_cache.items() if e <= now]:
+                del _user_cache[key]
+            if len(_user_cache) >= _USER_CACHE_MAXSIZE:
+                del _user_cache[next(iter(_user_cache))]
+        _user_cache[user_id] = (snapshot, now + _USER_CACHE_TTL_SECONDS)
+    return UserDB.model_validate(snapshot)
+
+
+def _verify_token(token: str) -> TokenPayload:
+    """Decode the bearer token, mapping any verification failure to a 403."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
-        token_data = TokenPayload(**payload)
+        return _decode_token(token)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(UserDB, int(token_data.sub))
+
+
+def get_current_user(session: SessionDep, token: TokenDep) -> UserDB:
+    """Get the current user from the token, ensuring they are active."""
+    token_data = _verify_token(token)
+    user = _load_user(session, int(token_data.sub))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     if not user.status == UserStatus.ACTIVE:
@@ -51,8 +140,23 @@ def get_current_user(session: SessionDep, token: TokenDep) -> UserDB:
 CurrentUser = Annotated[UserDB, Depends(get_current_user)]
 
 
-def get_current_active_admin(current_user: CurrentUser) -> UserDB:
-    """Get the current user and ensure they are an admin."""
+def get_admin_token_payload(token: TokenDep) -> TokenPayload:
+    """Check the token's admin claim, rejecting non-admins before any user lookup."""
+    token_data = _verify_token(token)
+    if not token_data.admin:
+        raise HTTPException(status_code=403, detail="The user doesn't have enough privileges")
+    return token_data
+
+
+def get_current_active_admin(
+    admin_claim: Annotated[TokenPayload, Depends(get_admin_token_payload)],
+    current_user: CurrentUser,
+) -> UserDB:
+    """Get the current user and ensure they are an admin.
+
+    The token's admin claim is resolved first, so non-admin tokens are turned away
+    without loading the user; the role is then confirmed against the user record.
+    """
     if not current_user.role == UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="The user doesn't have enough privileges")
     return current_user
@@ -1,10 +1,13 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 
 from app.api.routes import admin, auth, user
 
 # from app.core.config import settings
 
-api_router = APIRouter()
+# Set on the router (not only the app) so every API route renders with orjson wherever
+# the router is mounted
+api_router = APIRouter(default_response_class=ORJSONResponse)
 api_router.include_router(auth.router)
 api_router.include_router(user.router)
 api_router.include_router(admin.router)
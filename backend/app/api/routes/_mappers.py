@@ -1,60 +1,85 @@
 from __future__ import annotations
 
-import json
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from typing import Any
 
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
 from app import crud
 from app.core import storage
 from app.gis.consts import districts
 from app.models import (
+    ConstraintFactor,
     MapTask,
     MapTaskDB,
     MapTaskDetails,
     MapTaskFile,
     MapTaskFileDB,
+    MapTaskProgress,
+    MapTaskProgressDB,
     MapTaskStatus,
+    SuitabilityFactor,
 )
 
 # Build a fast lookup for district code -> name
 _DISTRICT_CODE_TO_NAME = {code: name for code, name in districts}
 
+# Precomputed status value -> description (e.g. 3 -> "Success")
+_STATUS_DESC: dict[int, str] = {s.value: s.name.title() for s in MapTaskStatus}
+
 
 def _ensure_list(val):
     """Ensure the value is a list, parsing from JSON if it's a string."""
-    return json.loads(val) if isinstance(val, str) else val
+    return orjson.loads(val) if isinstance(val, str | bytes) else val
 
 
 def as_aware_utc(dt: datetime | None) -> datetime | None:
     """Convert a datetime to an aware UTC datetime, or None if input is None."""
     if dt is None:
         return None
-    if dt.tzinfo is None:
+    tz = dt.tzinfo
+    if tz is None:
         return dt.replace(tzinfo=UTC)
+    if tz is UTC:
+        return dt
     return dt.astimezone(UTC)
 
 
 def _status_desc(status: int) -> str | None:
     """Get a human-readable description of the MapTask status."""
-    try:
-        return MapTaskStatus(status).name.title()
-    except Exception:
-        return None
+    return _STATUS_DESC.get(status)
+
+
+# Factor JSON is user-supplied at task creation, so it is still validated on the way out
+_CONSTRAINT_FACTORS_ADAPTER = TypeAdapter(list[ConstraintFactor])
+_SUITABILITY_FACTORS_ADAPTER = TypeAdapter(list[SuitabilityFactor])
+
+# Sentinel distinguishing "email not supplied" from a known-missing (None) email
+_UNSET: Any = object()
+
 
+def to_map_task(session: Any, data: MapTaskDB, user_email: str | None = _UNSET) -> MapTask:
+    """Map a MapTaskDB row to API MapTask (without files).
 
-def to_map_task(session: Any, data: MapTaskDB) -> MapTask:
-    """Map a MapTaskDB row to API MapTask (without files)."""
-    # Get user email (best effort)
-    user_email: str | None = None
-    try:
-        user = crud.get_user_by_id(session=session, user_id=data.user_id)
-        if user:
-            user_email = user.email
-    except Exception:
+    Pass `user_email` when it was already loaded (e.g. joined in a list query) to skip
+    the per-row user lookup.
+    """
+    if user_email is _UNSET:
+        # Get user email (best effort)
         user_email = None
+        try:
+            user = crud.get_user_by_id(session=session, user_id=data.user_id)
+            if user:
+                user_email = user.email
+        except Exception:
+            user_email = None
 
     district_name = _DISTRICT_CODE_TO_NAME.get(data.district)
-    return MapTask(
+    # Every field is a trusted DB value or derived from one, so skip validation
+    return MapTask.model_construct(
         id=data.id,
         name=data.name,
         user_id=data.user_id,
@@ -69,6 +94,34 @@ def to_map_task(session: Any, data: MapTaskDB) -> MapTask:
     )
 
 
+def _to_files(db_files: Iterable[MapTaskFileDB]) -> list[MapTaskFile]:
+    """Copy file rows to API models and replace their keys with presigned URLs."""
+    # Rows come straight from the DB, so skip re-validating them
+    files: list[MapTaskFile] = [
+        MapTaskFile.model_construct(**{k: getattr(file, k) for k in MapTaskFile.model_fields})
+        for file in db_files
+    ]
+    if files:
+        urls = storage.generate_presigned_urls([f.file_path for f in files])
+        for f, url in zip(files, urls, strict=True):
+            f.file_path = url
+    return files
+
+
+def _with_details(base: MapTask, data: MapTaskDB, files: list[MapTaskFile]) -> MapTaskDetails:
+    """Extend a mapped MapTask with its files and parsed factors."""
+    return MapTaskDetails.model_construct(
+        **dict(base),
+        files=files,
+        constraint_factors=_CONSTRAINT_FACTORS_ADAPTER.validate_python(
+            _ensure_list(data.constraint_factors)
+        ),
+        suitability_factors=_SUITABILITY_FACTORS_ADAPTER.validate_python(
+            _ensure_list(data.suitability_factors)
+        ),
+    )
+
+
 def to_map_task_details(session: Any, data: MapTaskDB) -> MapTaskDetails:
     """Map MapTaskDB to MapTaskDetails, including files and parsed factors."""
     base = to_map_task(session, data)
@@ -77,23 +130,56 @@ def to_map_task_details(session: Any, data: MapTaskDB) -> MapTaskDetails:
     db_files: list[MapTaskFileDB] = crud.get_files_by_id(
         session=session, user_id=data.user_id, map_task_id=data.id
     )
-    files: list[MapTaskFile] = [MapTaskFile(**file.model_dump()) for file in db_files]
-    for f in files:
-        f.file_path = storage.generate_presigned_url(f.file_path)
-
-    return MapTaskDetails(
-        id=base.id,
-        name=base.name,
-        user_id=base.user_id,
-        user_email=base.user_email,
-        district_code=base.district_code,
-        district_name=base.district_name,
-        status=base.status,
-        status_desc=base.status_desc,
-        started_at=base.started_at,
-        ended_at=base.ended_at,
-        created_at=base.created_at,
-        files=files,
-        constraint_factors=_ensure_list(data.constraint_factors),
-        suitability_factors=_ensure_list(data.suitability_factors),
-    )
+    return _with_details(base, data, _to_files(db_files))
+
+
+def to_map_task_details_batch(
+    session: Any, rows: Iterable[MapTaskDB], user_email: str | None = _UNSET
+) -> list[MapTaskDetails]:
+    """Map many MapTaskDB rows to MapTaskDetails with one file query for the whole list.
+
+    Files of all rows are loaded together and presigned in a single batch. Pass
+    `user_email` when every row has the same, already-known owner (e.g. the current
+    user's own task list); otherwise owner emails are loaded in one query.
+    """
+    rows = list(rows)
+    if user_email is _UNSET:
+        emails = crud.get_user_emails_by_ids(session=session, user_ids=(r.user_id for r in rows))
+    else:
+        emails = None
+    db_files = crud.get_files_by_task_ids(session=session, map_task_ids=[r.id for r in rows])
+    files_by_task: dict[int, list[MapTaskFile]] = {}
+    for f in _to_files(db_files):
+        files_by_task.setdefault(f.map_task_id, []).append(f)
+    return [
+        _with_details(
+            to_map_task(session, r, emails.get(r.user_id) if emails is not None else user_email),
+            r,
+            files_by_task.get(r.id, []),
+        )
+        for r in rows
+    ]
+
+
+def to_map_task_progress_list(rows: Iterable[MapTaskProgressDB]) -> list[MapTaskProgress]:
+    """Map MapTaskProgressDB rows to API MapTaskProgress items.
+
+    Rows come straight from the DB, so they are copied with model_construct rather than
+    validated, and the ORM rows themselves are left untouched.
+    """
+    progress_list: list[MapTaskProgress] = []
+    for row in rows:
+        values = {k: getattr(row, k) for k in MapTaskProgress.model_fields}
+        # Loaded rows are already aware UTC (UTCDateTime); this only fixes up naive values
+        values["created_at"] = as_aware_utc(values["created_at"])
+        progress_list.append(MapTaskProgress.model_construct(**values))
+    return progress_list
+
+
+def to_json_response(payload: BaseModel) -> Response:
+    """Serialize an already-built response model straight to JSON bytes.
+
+    Returning a Response skips FastAPI's response_model validation/serialization pass;
+    the route's `response_model` still documents the schema in OpenAPI.
+    """
+    return Response(content=payload.model_dump_json(), media_type="application/json")
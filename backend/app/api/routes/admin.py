@@ -1,11 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 
 from app import crud
-from app.api.deps import CurrentAdminUser, SessionDep
+from app.api.deps import CurrentAdminUser, SessionDep, invalidate_cached_user
 from app.api.routes._mappers import (
-    as_aware_utc as _as_aware_utc,
+    to_json_response as _to_json_response,
     to_map_task as _to_map_task,
     to_map_task_details as _to_map_task_details,
+    to_map_task_progress_list as _to_map_task_progress_list,
 )
 from app.core import storage
 from app.models import (
@@ -13,7 +14,6 @@ from app.models import (
     AdminUpdateUserStatusRequest,
     BaseResp,
     MapTask4AdminPageData,
-    MapTaskProgress,
     MapTaskProgressDB,
     MapTaskProgressListResp,
     User4Admin,
@@ -24,14 +24,14 @@ router = APIRouter(tags=["Admin"])
 
 
 @router.get("/admin/users", response_model=User4AdminPageData, summary="Get user list for admin")
-async def admin_get_user_list(
+def admin_get_user_list(
     session: SessionDep,
     current_user: CurrentAdminUser,
     page_size: int | None = 20,
     current_page: int | None = 1,
     keyword: str | None = None,
     status: int | None = None,
-) -> User4AdminPageData:
+) -> Response:
     """
     Get a paginated list of users for admin, with optional filtering by keyword and status.
     """
@@ -45,8 +45,9 @@ async def admin_get_user_list(
         keyword=keyword,
         status=status,
     )
+    # Rows and paging values are server-built, so skip re-validating them
     users = [
-        User4Admin(
+        User4Admin.model_construct(
             id=row.id,
             provider=row.provider,
             sub=row.sub,
@@ -58,17 +59,19 @@ async def admin_get_user_list(
         )
         for row in rows
     ]
-    return User4AdminPageData(
-        error=0,
-        list=users,
-        total=total,
-        current_page=cp,
-        page_size=ps,
+    return _to_json_response(
+        User4AdminPageData.model_construct(
+            error=0,
+            list=users,
+            total=total,
+            current_page=cp,
+            page_size=ps,
+        )
     )
 
 
 @router.post("/admin/user-status", response_model=BaseResp, summary="Update user status for admin")
-async def admin_update_user_status(
+def admin_update_user_status(
     session: SessionDep,
     current_user: CurrentAdminUser,
     payload: AdminUpdateUserStatusRequest,
@@ -81,13 +84,14 @@ async def admin_update_user_status(
     )
     if not updated:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_cached_user(payload.user_id)
     return BaseResp(error=0)
 
 
 @router.get(
     "/admin/map-tasks", response_model=MapTask4AdminPageData, summary="Get map tasks for admin"
 )
-async def admin_get_map_tasks(
+def admin_get_map_tasks(
     session: SessionDep,
     current_user: CurrentAdminUser,
     page_size: int | None = 20,
@@ -95,7 +99,7 @@ async def admin_get_map_tasks(
     name: str | None = None,
     user_id: int | None = None,
     status: int | None = None,
-) -> MapTask4AdminPageData:
+) -> Response:
     """
     Get a paginated list of map tasks for admin, with optional filtering by name, user ID, and status.
     """
@@ -109,13 +113,15 @@ async def admin_get_map_tasks(
         user_id=user_id,
         status=status,
     )
-    tasks = [_to_map_task(session, row) for row in rows]
-    return MapTask4AdminPageData(
-        error=0,
-        list=tasks,
-        total=total,
-        current_page=cp,
-        page_size=ps,
+    tasks = [_to_map_task(session, row, user_email=email) for row, email in rows]
+    return _to_json_response(
+        MapTask4AdminPageData.model_construct(
+            error=0,
+            list=tasks,
+            total=total,
+            current_page=cp,
+            page_size=ps,
+        )
     )
 
 
@@ -124,7 +130,7 @@ async def admin_get_map_tasks(
     response_model=AdminMapTaskResp,
     summary="Get map task details for admin",
 )
-async def admin_get_map_task(
+def admin_get_map_task(
     session: SessionDep,
     current_user: CurrentAdminUser,
     taskId: int,
@@ -144,19 +150,14 @@ async def admin_get_map_task(
     response_model=MapTaskProgressListResp,
     summary="Get progress of a map task for admin",
 )
-async def admin_get_map_task_progress(
-    session: SessionDep, current_user: CurrentAdminUser, taskId: int
-):
+def admin_get_map_task_progress(session: SessionDep, current_user: CurrentAdminUser, taskId: int):
     """
     Get the progress history of a specific map task by ID for admin.
     """
     rows: list[MapTaskProgressDB] = crud.admin_get_map_task_progress(
         session=session, task_id=taskId
     )
-    for row in rows:
-        row.created_at = _as_aware_utc(row.created_at)
-        row.updated_at = _as_aware_utc(row.updated_at)
-    progress_list = [MapTaskProgress.model_validate(row.model_dump()) for row in rows]
+    progress_list = _to_map_task_progress_list(rows)
     return MapTaskProgressListResp(error=0, list=progress_list)
 
 
@@ -165,7 +166,7 @@ async def admin_get_map_task_progress(
     response_model=BaseResp,
     summary="Initialize input directory for admin",
 )
-async def admin_initialize_input_directory(session: SessionDep, current_user: CurrentAdminUser):
+def admin_initialize_input_directory(session: SessionDep, current_user: CurrentAdminUser):
     """
     Initialize the input directory from the storage bucket for admin.
     """
@@ -1,13 +1,15 @@
 from datetime import timedelta
+from http.cookiejar import DefaultCookiePolicy
 from typing import Annotated, Any
 
 import jwt
 import requests
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
+from requests.adapters import HTTPAdapter
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, SessionDep, invalidate_cached_user
 from app.core import security
 from app.core.config import settings
 from app.models import (
@@ -26,8 +28,31 @@ from app.models import (
 router = APIRouter(tags=["Auth"])
 
 
+def _build_google_http() -> requests.Session:
+    """Build the HTTP session shared by all code exchanges.
+
+    Repeated logins reuse keep-alive TLS connections to Google from a pooled adapter
+    (urllib3's pool is thread-safe). The session is shared by threadpool workers serving
+    different users, so it must hold no per-user state: its cookie jar rejects every cookie.
+    """
+    http = requests.Session()
+    http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
+    return http
+
+
+_google_http = _build_google_http()
+
+# Google's signing keys; PyJWKClient caches the JWK set and the parsed keys by kid,
+# so verifying an id_token normally needs no network round-trip
+_GOOGLE_ISSUERS = ["https://accounts.google.com", "accounts.google.com"]
+_google_jwks = jwt.PyJWKClient(
+    "https://www.googleapis.com/oauth2/v3/certs", cache_keys=True, lifespan=3600, timeout=10
+)
+
+
 @router.post("/user-login", response_model=Token, summary="Login with Local Users")
-async def user_login(
+def user_login(
     session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Token:
     """
@@ -38,6 +63,8 @@ async def user_login(
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.status == UserStatus.ACTIVE:
         raise HTTPException(status_code=400, detail="Inactive user")
+    # last_login just changed; don't serve the previous snapshot to /user-info
+    invalidate_cached_user(user.id)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return Token(
         access_token=security.create_access_token(
@@ -53,7 +80,7 @@ def get_user_info(current_user: CurrentUser) -> Any:
 
 
 @router.post("/user-register", response_model=UserPublic, summary="Register a new user")
-async def user_register(session: SessionDep, user_in: RegisterRequest):
+def user_register(session: SessionDep, user_in: RegisterRequest):
     """Register a new user with email and password."""
     user = crud.get_user_by_email(session=session, email=user_in.email)
     if user:
@@ -76,14 +103,14 @@ async def get_oidc_info() -> OidcInfoResp:
 
 
 @router.post("/oidc-token", response_model=PostLoginResp, summary="Use code to get OIDC token")
-async def get_oidc_token(session: SessionDep, payload: OidcTokenRequest) -> PostLoginResp:
+def get_oidc_token(session: SessionDep, payload: OidcTokenRequest) -> PostLoginResp:
     """Exchange OIDC authorization code for tokens and log in / register the user."""
     if not payload.code:
         raise HTTPException(status_code=400, detail="Code required")
     # print(settings.GOOGLE_CLIENT_ID, settings.GOOGLE_CLIENT_SECRET)
     # print("Received OIDC code:", payload.code)
     # 1) Exchange authorization code for tokens
-    token_resp = requests.post(
+    token_resp = _google_http.post(
         "https://oauth2.googleapis.com/token",
         data={
             "code": payload.code,
@@ -107,11 +134,15 @@ async def get_oidc_token(session: SessionDep, payload: OidcTokenRequest) -> Post
     if not id_token_str:
         raise HTTPException(status_code=400, detail="No id_token in response")
 
-    # print("ID Token:", id_token_str)
-    # decode jwt
-
     try:
-        idinfo = jwt.decode(id_token_str, options={"verify_signature": False})
+        signing_key = _google_jwks.get_signing_key_from_jwt(id_token_str).key
+        idinfo = jwt.decode(
+            id_token_str,
+            signing_key,
+            algorithms=["RS256"],
+            audience=settings.GOOGLE_CLIENT_ID,
+            issuer=_GOOGLE_ISSUERS,
+        )
     except Exception as e:
         print("Failed to decode ID token:", e)
         raise HTTPException(status_code=400, detail="Invalid ID token")
@@ -138,6 +169,7 @@ async def get_oidc_token(session: SessionDep, payload: OidcTokenRequest) -> Post
     except Exception:
         # Non-fatal
         pass
+    invalidate_cached_user(user.id)
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
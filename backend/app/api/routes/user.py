@@ -1,12 +1,18 @@
-from datetime import datetime, timedelta
+import hashlib
+import time
+from functools import lru_cache
+from itertools import islice
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Response
+from pydantic import BaseModel
 
 from app import crud
 from app.api.deps import CurrentAdminUser, CurrentUser, SessionDep
 from app.api.routes._mappers import (
-    as_aware_utc as _as_aware_utc,
+    to_json_response as _to_json_response,
     to_map_task_details as _to_map_task_details,
+    to_map_task_details_batch as _to_map_task_details_batch,
+    to_map_task_progress_list as _to_map_task_progress_list,
 )
 from app.core.security import gen_tile_signature
 from app.gis.consts import constraint_factors, districts
@@ -17,33 +23,128 @@ from app.models import (
     DistrictHistogram,
     DistrictHistogramItem,
     DistrictHistogramsResp,
-    MapTask,
     MapTaskDB,
-    MapTaskProgress,
     MapTaskProgressDB,
     MapTaskProgressListResp,
     MyMapTaskListResp,
     MyMapTaskResp,
     MyMapTaskTileSignature,
     MyMapTaskTileSignatureResp,
+    SelectOptionItem,
     SelectOptionListResp,
 )
 
 router = APIRouter(tags=["User"])
 
+_TILE_SIGNATURE_TTL_SECONDS = 3600
+
+# Select options and histograms come from static constants, so their JSON bodies are
+# rendered once per distinct query and memoized as (bytes, ETag); handlers return them
+# as-is and answer matching If-None-Match revalidations with an empty 304.
+_STATIC_CACHE_CONTROL = "private, max-age=3600"
+
+
+def _render_static(payload: BaseModel) -> tuple[bytes, str]:
+    """Render a static response body once, with a strong ETag derived from its content."""
+    body = payload.model_dump_json().encode()
+    return body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def _static_json_response(request: Request, rendered: tuple[bytes, str]) -> Response:
+    """Serve a pre-rendered static body, or 304 if the client already holds this ETag."""
+    body, etag = rendered
+    headers = {"ETag": etag, "Cache-Control": _STATIC_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Options are indexed up front as (item, lowercase label) for keyword matching.
+_DISTRICT_OPTIONS = tuple(
+    (SelectOptionItem(code=code, label=name), name.lower()) for code, name in districts
+)
+_CONSTRAINT_FACTOR_OPTIONS = tuple(
+    (SelectOptionItem(code=code, label=label), label.lower()) for code, label in constraint_factors
+)
+
+
+def _options_json(
+    options: tuple[tuple[SelectOptionItem, str], ...], kw: str, limit: int | None
+) -> tuple[bytes, str]:
+    """Filter indexed options by lowercase keyword, apply the limit if positive, render JSON."""
+    if kw:
+        matches = (item for item, label_lower in options if kw in label_lower)
+    else:
+        matches = (item for item, _ in options)
+    # Stop scanning as soon as the limit is reached
+    items = list(islice(matches, limit if limit is not None and limit > 0 else None))
+    return _render_static(SelectOptionListResp(error=0, list=items))
+
+
+@lru_cache(maxsize=256)
+def _district_options_json(kw: str, limit: int | None) -> tuple[bytes, str]:
+    return _options_json(_DISTRICT_OPTIONS, kw, limit)
+
+
+@lru_cache(maxsize=256)
+def _constraint_factor_options_json(kw: str, limit: int | None) -> tuple[bytes, str]:
+    return _options_json(_CONSTRAINT_FACTOR_OPTIONS, kw, limit)
+
+
+# Histogram items validated once at import: district code -> {kind: item}
+_HISTOGRAM_ITEMS: dict[str, dict[str, DistrictHistogramItem]] = {
+    code: {
+        kind: DistrictHistogramItem(kind=kind, histogram=DistrictHistogram(**hist))
+        for kind, hist in district_data.items()
+    }
+    for code, district_data in HISTOGRAMS.items()
+}
+
+
+@lru_cache(maxsize=1024)
+def _district_histograms_json(district_code: str, kind: str | None) -> tuple[bytes, str]:
+    """Render the histograms response for a district (optionally one kind).
+
+    Raises HTTPException(404) for unknown districts/kinds; those are not cached.
+    """
+    district_items = _HISTOGRAM_ITEMS.get(district_code)
+    if not district_items:
+        raise HTTPException(
+            status_code=404, detail="District not found or no histogram data available"
+        )
+
+    if kind:
+        # Only return the specified kind if present
+        item = district_items.get(kind)
+        if not item:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Histogram kind '{kind}' not found for district {district_code}",
+            )
+        items = [item]
+    else:
+        # Return all available kinds for the district
+        items = list(district_items.values())
+
+    return _render_static(DistrictHistogramsResp(error=0, list=items))
+
 
 @router.get("/user/my-map-tasks", response_model=MyMapTaskListResp, summary="Get user's map tasks")
-async def user_get_my_map_tasks(
+def user_get_my_map_tasks(
     session: SessionDep, current_user: CurrentUser, completed: bool | None = None
-) -> MyMapTaskListResp:
+) -> Response:
     """Get a list of the current user's map tasks, optionally filtering by completion status."""
     db_list = crud.list_map_tasks(session=session, user_id=current_user.id, completed=completed)
-    tasks: list[MapTask] = [_to_map_task_details(session, data) for data in db_list]
-    return MyMapTaskListResp(error=0, list=tasks)
+    tasks = _to_map_task_details_batch(session, db_list, user_email=current_user.email)
+    return _to_json_response(MyMapTaskListResp.model_construct(error=0, list=tasks))
 
 
 @router.post("/user/my-map-tasks", response_model=MyMapTaskResp, summary="Create a new map task")
-async def user_create_map_task(
+def user_create_map_task(
     background_tasks: BackgroundTasks,
     session: SessionDep,
     current_user: CurrentUser,
@@ -62,9 +163,7 @@ async def user_create_map_task(
     response_model=MyMapTaskResp,
     summary="Get a user's map task by id",
 )
-async def user_get_map_task(
-    session: SessionDep, current_user: CurrentUser, taskId: int
-) -> MyMapTaskResp:
+def user_get_map_task(session: SessionDep, current_user: CurrentUser, taskId: int) -> MyMapTaskResp:
     """Get details of a specific map task belonging to the current user."""
     data: MapTaskDB | None = crud.get_map_task(
         session=session, user_id=current_user.id, task_id=taskId
@@ -76,11 +175,19 @@ async def user_get_map_task(
 
 
 @router.delete("/user/my-map-tasks/{taskId}", response_model=BaseResp, summary="Delete a map task")
-async def user_delete_map_task(session: SessionDep, current_user: CurrentUser, taskId: int):
+def user_delete_map_task(
+    session: SessionDep,
+    current_user: CurrentUser,
+    taskId: int,
+    background_tasks: BackgroundTasks,
+):
     """Delete a specific map task belonging to the current user."""
     try:
         data: MapTaskDB | None = crud.delete_map_task(
-            session=session, user_id=current_user.id, task_id=taskId
+            session=session,
+            user_id=current_user.id,
+            task_id=taskId,
+            background_tasks=background_tasks,
         )
     except ValueError as e:
         # Trying to delete a running task
@@ -93,7 +200,7 @@ async def user_delete_map_task(session: SessionDep, current_user: CurrentUser, t
 @router.post(
     "/user/my-map-tasks/{taskId}/cancel", response_model=BaseResp, summary="Cancel a map task"
 )
-async def user_cancel_map_task(session: SessionDep, current_user: CurrentUser, taskId: int):
+def user_cancel_map_task(session: SessionDep, current_user: CurrentUser, taskId: int):
     """Cancel a specific map task belonging to the current user."""
     data: MapTaskDB | None = crud.cancel_map_task(
         session=session, user_id=current_user.id, task_id=taskId
@@ -108,17 +215,15 @@ async def user_cancel_map_task(session: SessionDep, current_user: CurrentUser, t
     response_model=MyMapTaskTileSignatureResp,
     summary="Get a map task's tile signature",
 )
-async def user_get_map_task_tile_signature(
-    session: SessionDep, current_user: CurrentUser, taskId: int
-):
+def user_get_map_task_tile_signature(session: SessionDep, current_user: CurrentUser, taskId: int):
     """Get a tile signature for accessing map tiles of a specific map task."""
     data: MapTaskDB | None = crud.get_map_task(
         session=session, user_id=current_user.id, task_id=taskId
     )
     if not data:
         raise HTTPException(status_code=404, detail="Task not found")
-    # generate 1 hour later timestamp
-    exp = int((datetime.now() + timedelta(hours=1)).timestamp())
+    # signature expires 1 hour from now (epoch seconds)
+    exp = int(time.time()) + _TILE_SIGNATURE_TTL_SECONDS
     # generate tile signature
     sig = gen_tile_signature(current_user.id, taskId, exp)
     return MyMapTaskTileSignatureResp(
@@ -129,7 +234,7 @@ async def user_get_map_task_tile_signature(
 @router.post(
     "/user/my-map-tasks/{taskId}/duplicate", response_model=BaseResp, summary="Duplicate a map task"
 )
-async def user_duplicate_map_task(
+def user_duplicate_map_task(
     background_tasks: BackgroundTasks,
     session: SessionDep,
     current_user: CurrentAdminUser,
@@ -150,21 +255,15 @@ async def user_duplicate_map_task(
     summary="Get district select options",
 )
 async def user_get_district_select_options(
-    session: SessionDep,
+    request: Request,
     current_user: CurrentUser,
     limit: int | None = 50,
     keyword: str | None = None,
-) -> SelectOptionListResp:
+) -> Response:
     """Get district select options."""
-    # Build options from constants; filter by keyword; then apply limit if provided and positive
-    items = [{"code": code, "label": name} for code, name in districts]
-    if keyword:
-        kw = keyword.strip().lower()
-        if kw:
-            items = [it for it in items if kw in it["label"].lower()]
-    if limit is not None and limit > 0:
-        items = items[:limit]
-    return SelectOptionListResp(error=0, list=items)
+    kw = keyword.strip().lower() if keyword else ""
+    rendered = _district_options_json(kw, limit if limit is not None and limit > 0 else None)
+    return _static_json_response(request, rendered)
 
 
 @router.get(
@@ -173,21 +272,17 @@ async def user_get_district_select_options(
     summary="Get constraint factors select options",
 )
 async def user_get_constraint_factors_select_options(
-    session: SessionDep,
+    request: Request,
     current_user: CurrentUser,
     limit: int | None = 50,
     keyword: str | None = None,
-) -> SelectOptionListResp:
+) -> Response:
     """Get constraint factors select options."""
-    # Build options from constants; filter by keyword; then apply limit if provided and positive
-    items = [{"code": code, "label": label} for code, label in constraint_factors]
-    if keyword:
-        kw = keyword.strip().lower()
-        if kw:
-            items = [it for it in items if kw in it["label"].lower()]
-    if limit is not None and limit > 0:
-        items = items[:limit]
-    return SelectOptionListResp(error=0, list=items)
+    kw = keyword.strip().lower() if keyword else ""
+    rendered = _constraint_factor_options_json(
+        kw, limit if limit is not None and limit > 0 else None
+    )
+    return _static_json_response(request, rendered)
 
 
 @router.get(
@@ -195,15 +290,12 @@ async def user_get_constraint_factors_select_options(
     response_model=MapTaskProgressListResp,
     summary="Get progress of a map task",
 )
-async def user_get_map_task_progress(session: SessionDep, current_user: CurrentUser, taskId: int):
+def user_get_map_task_progress(session: SessionDep, current_user: CurrentUser, taskId: int):
     """Get the progress history of a specific map task belonging to the current user."""
     rows: list[MapTaskProgressDB] = crud.get_map_task_progress(
         session=session, user_id=current_user.id, task_id=taskId
     )
-    for row in rows:
-        row.created_at = _as_aware_utc(row.created_at)
-        row.updated_at = _as_aware_utc(row.updated_at)
-    progress_list = [MapTaskProgress.model_validate(row.model_dump()) for row in rows]
+    progress_list = _to_map_task_progress_list(rows)
     return MapTaskProgressListResp(error=0, list=progress_list)
 
 
@@ -213,32 +305,11 @@ async def user_get_map_task_progress(session: SessionDep, current_user: CurrentU
     summary="Get district input data histograms",
 )
 async def user_get_district_histograms(
-    session: SessionDep,
+    request: Request,
     current_user: CurrentUser,
     districtCode: str,
     kind: str | None = None,
 ):
     """Get input data histograms for a specific district, optionally filtering by kind."""
-    # Look up histograms for the district
-    district_data = HISTOGRAMS.get(districtCode)
-    if not district_data:
-        raise HTTPException(
-            status_code=404, detail="District not found or no histogram data available"
-        )
-
-    items = []
-    if kind:
-        # Only return the specified kind if present
-        hist = district_data.get(kind)
-        if not hist:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Histogram kind '{kind}' not found for district {districtCode}",
-            )
-        items.append(DistrictHistogramItem(kind=kind, histogram=DistrictHistogram(**hist)))
-    else:
-        # Return all available kinds for the district
-        for k, hist in district_data.items():
-            items.append(DistrictHistogramItem(kind=k, histogram=DistrictHistogram(**hist)))
-
-    return DistrictHistogramsResp(error=0, list=items)
+    rendered = _district_histograms_json(districtCode, kind or None)
+    return _static_json_response(request, rendered)
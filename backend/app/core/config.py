@@ -73,6 +73,10 @@ class Settings(BaseSettings):
     MYSQL_USER: str = "root"
     MYSQL_PASSWORD: str = ""
     MYSQL_DB: str = "site_analyzer"
+    # Connection pool per process; recycle below MySQL's wait_timeout (8h by default)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
 
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
@@ -89,6 +93,9 @@ class Settings(BaseSettings):
     STORAGE_REGION: str
     STORAGE_SIGN_EXPIRE_SECONDS: int = 3600  # 1 hour
 
+    # Size of AnyIO's worker-thread pool, which runs every sync handler and dependency
+    THREADPOOL_MAX_WORKERS: int = 100
+
     RELEASE_READ_ONLY: bool = False
     RELEASE_ALLOW_REGISTRATION: bool = True
 
@@ -1,6 +1,20 @@
-from sqlmodel import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import Session, create_engine
 
 from app.core.config import settings
 
-# Create the database engine
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+# Create the database engine. Pre-ping and recycling drop connections MySQL has closed
+# while idle; LIFO reuse keeps a small set of connections warm instead of cycling all
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=True,
+    pool_use_lifo=True,
+    connect_args={"connect_timeout": 5},
+)
+
+# Session factory bound once to the engine and reused for every request.
+# Objects stay loaded after commit; CRUD helpers refresh explicitly when needed.
+SessionLocal = sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
@@ -2,15 +2,14 @@ import base64
 import hashlib
 import hmac
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
 from typing import Any
 
+import bcrypt
 import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Security settings
 ALGORITHM = "HS256"
 
@@ -25,21 +24,41 @@ def create_access_token(subject: int | Any, admin: bool, expires_delta: timedelt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
 
 def get_password_hash(password: str) -> str:
     """Get the hashed version of a password."""
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> bytes:
+    """Throwaway bcrypt hash at the normal cost, generated on first use."""
+    return bcrypt.hashpw(b"dummy-password", bcrypt.gensalt())
+
+
+def dummy_verify_password(plain_password: str) -> bool:
+    """Spend the same bcrypt time as verify_password when there is no user to check.
+
+    Keeps unknown-email logins as slow as wrong-password ones, so response timing
+    doesn't reveal which emails are registered. Always returns False.
+    """
+    bcrypt.checkpw(plain_password.encode(), _dummy_password_hash())
+    return False
+
+
+@lru_cache(maxsize=4)
+def _tile_hmac(secret_key: str) -> hmac.HMAC:
+    """HMAC-SHA256 state with the key already absorbed; copied for each signature."""
+    return hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
 
 
 def gen_tile_signature(user: int, task: int, exp: int) -> str:
     """Generate a tile access signature for a user and task that expires at a given time."""
-    # Create a message string
-    message = f"{user}:{task}:{exp}".encode()
-    # Use SECRET_KEY as bytes
-    key = settings.SECRET_KEY.encode()
-    # HMAC-SHA256
-    signature = hmac.new(key, message, hashlib.sha256).digest()
+    # HMAC-SHA256 over "user:task:exp", keyed with SECRET_KEY. Copying the keyed state
+    # skips re-hashing the key pads on every call
+    mac = _tile_hmac(settings.SECRET_KEY).copy()
+    mac.update(f"{user}:{task}:{exp}".encode())
     # URL-safe base64 encode, remove trailing '=' for compactness
-    return base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+    return base64.urlsafe_b64encode(mac.digest()).rstrip(b"=").decode()
@@ -2,15 +2,28 @@ import logging
 import os
 import shutil
 import tarfile
+import threading
+import time
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Connection pool size for the S3 client, so concurrent requests (chunked deletes,
+# API handlers in the threadpool) don't queue for a connection
+_S3_MAX_POOL_CONNECTIONS = 16
+# Concurrent 1000-key DeleteObjects calls, kept lower to stay clear of S3's
+# per-prefix delete throttling (~3,500 deletes/s)
+_DELETE_MAX_WORKERS = 8
+
 # Connect to MinIO
 s3 = boto3.client(
     "s3",
@@ -18,6 +31,13 @@ s3 = boto3.client(
     aws_access_key_id=settings.STORAGE_ACCESS_KEY,
     aws_secret_access_key=settings.STORAGE_SECRET_KEY,
     region_name=settings.STORAGE_REGION,
+    # TCP keepalive stops idle pooled connections being dropped by NAT/load balancers;
+    # adaptive retries back off client-side when bulk calls get throttled
+    config=Config(
+        max_pool_connections=_S3_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        retries={"mode": "adaptive", "max_attempts": 5},
+    ),
 )
 
 bucket_name = settings.STORAGE_BUCKET
@@ -87,47 +107,91 @@ def delete_file(key: str) -> bool:
         return False
 
 
-def delete_files(keys: Iterable[str]) -> dict:
+def delete_files(keys: Iterable[str], stop: threading.Event | None = None) -> dict:
     """Batch delete objects (best effort) for the provided iterable of keys.
 
     The CRUD layer calls this when deleting a map task to ensure all previously
-    uploaded result artifacts are removed from object storage.
+    uploaded result artifacts are removed from object storage. Chunks beyond the
+    first are sent concurrently.
+
+    `stop` cancels the batch: chunks that haven't been sent yet are skipped once it is
+    set. It is also set here when a whole chunk request fails (after the client's own
+    retries), so the remaining chunks aren't sent into the same failure. Skipped keys
+    count as errors.
 
     Returns a summary dict: {requested, deleted, errors}.
     """
     keys_list = [k for k in keys if k]
     if not keys_list:
         return {"requested": 0, "deleted": 0, "errors": 0}
-    deleted = 0
-    errors = 0
+    if stop is None:
+        stop = threading.Event()
     # S3 DeleteObjects allows up to 1000 per request
-    for i in range(0, len(keys_list), 1000):
-        chunk = keys_list[i : i + 1000]
-        try:
-            resp = s3.delete_objects(
-                Bucket=bucket_name,
-                Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True},
-            )
-            deleted += len(resp.get("Deleted", []))
-            errors += len(resp.get("Errors", []))
-            if resp.get("Errors"):
-                logger.warning(
-                    "Some keys failed to delete: %s", [e.get("Key") for e in resp["Errors"]]
-                )
-        except ClientError as e:
-            errors += len(chunk)
-            logger.warning("delete_files chunk failed (%s): %s", len(chunk), e)
-    return {"requested": len(keys_list), "deleted": deleted, "errors": errors}
+    chunks = [keys_list[i : i + 1000] for i in range(0, len(keys_list), 1000)]
+    if len(chunks) == 1:
+        results = [_delete_chunk(chunks[0], stop)]
+    else:
+        # boto3 clients are thread-safe
+        with ThreadPoolExecutor(max_workers=min(len(chunks), _DELETE_MAX_WORKERS)) as pool:
+            results = list(pool.map(_delete_chunk, chunks, repeat(stop)))
+    return {
+        "requested": len(keys_list),
+        "deleted": sum(deleted for deleted, _ in results),
+        "errors": sum(errors for _, errors in results),
+    }
+
+
+def _delete_chunk(chunk: list[str], stop: threading.Event) -> tuple[int, int]:
+    """Delete up to 1000 keys in one request unless `stop` is set; returns (deleted, errors)."""
+    if stop.is_set():
+        return 0, len(chunk)
+    try:
+        resp = s3.delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True},
+        )
+    except ClientError as e:
+        logger.warning("delete_files chunk failed (%s): %s", len(chunk), e)
+        stop.set()
+        return 0, len(chunk)
+    if resp.get("Errors"):
+        logger.warning("Some keys failed to delete: %s", [e.get("Key") for e in resp["Errors"]])
+    return len(resp.get("Deleted", [])), len(resp.get("Errors", []))
 
 
 def generate_presigned_url(
     key: str, expires_in_seconds: int = settings.STORAGE_SIGN_EXPIRE_SECONDS
 ) -> str:
-    # Generate a presigned URL for download
-    url = s3.generate_presigned_url(
+    """Presign a download URL for `key`, reusing one signed earlier in the same window.
+
+    Time is bucketed into windows of a quarter of the expiry, so a reused URL always
+    has at least 75% of its lifetime left when it is handed out.
+    """
+    window = max(expires_in_seconds // 4, 1)
+    return _presigned_url(key, expires_in_seconds, int(time.time()) // window)
+
+
+@lru_cache(maxsize=10000)
+def _presigned_url(key: str, expires_in_seconds: int, _window: int) -> str:
+    # Entries from past windows are never hit again and age out of the LRU
+    return s3.generate_presigned_url(
         "get_object", Params={"Bucket": bucket_name, "Key": key}, ExpiresIn=expires_in_seconds
     )
-    return url
+
+
+def generate_presigned_urls(
+    keys: Iterable[str], expires_in_seconds: int = settings.STORAGE_SIGN_EXPIRE_SECONDS
+) -> list[str]:
+    """Presign download URLs for many keys at once, preserving input order.
+
+    Presigning is local SigV4 signing (no network round-trip), so the batch is signed
+    serially; duplicate keys are signed only once.
+    """
+    keys_list = list(keys)
+    signed = {
+        key: generate_presigned_url(key, expires_in_seconds) for key in dict.fromkeys(keys_list)
+    }
+    return [signed[key] for key in keys_list]
 
 
 # ------------------------------
@@ -156,42 +220,28 @@ def _list_tgz_keys_under_prefix(prefix: str) -> list:
     return tgz_keys
 
 
-def download_tgz_archives(bucket_dir: str, local_cache_dir: str | None = None) -> list:
-    """Download all .tgz files under `bucket_dir` to a local cache directory.
+# Copy buffer for extracted members (large rasters); the stdlib default is 64 KiB
+_EXTRACT_COPY_BUFSIZE = 1024 * 1024
 
-    - If `local_cache_dir` is None, defaults to `~/.site-analyzer`.
-    - Existing same-named local files will be deleted before download.
 
-    Returns a list of absolute local file paths for the downloaded archives.
+def extract_tgz_from_s3(key: str, dest_dir: str, body=None) -> list:
+    """Stream a .tgz object from the bucket straight into `dest_dir`, with no local copy.
+
+    `body` may be an already-opened GetObject stream for `key`; it is closed either way.
+    Members are checked and overwritten as described in `_extract_members`.
+    Returns a list of extracted member relative paths.
     """
-    cache_dir = os.path.abspath(
-        os.path.expanduser(local_cache_dir or os.path.join("~", ".site-analyzer"))
-    )
-    os.makedirs(cache_dir, exist_ok=True)
-
-    keys = _list_tgz_keys_under_prefix(bucket_dir)
-    local_files: list[str] = []
-    for key in keys:
-        filename = os.path.basename(key)
-        local_path = os.path.join(cache_dir, filename)
-        # Remove existing file if present
-        try:
-            if os.path.exists(local_path):
-                os.remove(local_path)
-        except OSError as e:
-            logger.warning("Failed to remove existing file '%s': %s", local_path, e)
-        # Download
-        try:
-            s3.download_file(bucket_name, key, local_path)
-            local_files.append(local_path)
-            logger.info("Downloaded %s -> %s", key, local_path)
-        except ClientError as e:
-            logger.error("Failed to download '%s': %s", key, e)
-    return local_files
+    if body is None:
+        body = s3.get_object(Bucket=bucket_name, Key=key)["Body"]
+    try:
+        with tarfile.open(fileobj=body, mode="r|gz", bufsize=_EXTRACT_COPY_BUFSIZE) as tf:
+            return _extract_members(tf, key, dest_dir)
+    finally:
+        body.close()
 
 
-def _safe_extract_tgz(archive_path: str, dest_dir: str) -> list:
-    """Safely extract a .tgz archive into `dest_dir` with overwrite behavior.
+def _extract_members(tf: tarfile.TarFile, source: str, dest_dir: str) -> list:
+    """Extract the members of an open tar stream into `dest_dir` with overwrite behavior.
 
     Security considerations:
     - Prevent path traversal (no extraction outside of `dest_dir`).
@@ -207,96 +257,102 @@ def _safe_extract_tgz(archive_path: str, dest_dir: str) -> list:
     extracted: list[str] = []
     dest_dir_abs = os.path.abspath(dest_dir)
     os.makedirs(dest_dir_abs, exist_ok=True)
-    with tarfile.open(archive_path, mode="r:gz") as tf:
-        for member in tf.getmembers():
-            name = member.name
-            if not name or name.startswith("/"):
-                # Normalize absolute/empty names
-                name = name.lstrip("/")
-            # Normalize and guard against path traversal
-            target_path = os.path.abspath(os.path.join(dest_dir_abs, name))
-            if not target_path.startswith(dest_dir_abs + os.sep) and target_path != dest_dir_abs:
-                logger.warning("Skipping suspicious path in archive '%s': %s", archive_path, name)
-                continue
-
-            if member.issym() or member.islnk():
-                logger.warning("Skipping link member in archive '%s': %s", archive_path, name)
-                continue
+    for member in tf:
+        name = member.name
+        if not name or name.startswith("/"):
+            # Normalize absolute/empty names
+            name = name.lstrip("/")
+        # Normalize and guard against path traversal
+        target_path = os.path.abspath(os.path.join(dest_dir_abs, name))
+        if not target_path.startswith(dest_dir_abs + os.sep) and target_path != dest_dir_abs:
+            logger.warning("Skipping suspicious path in archive '%s': %s", source, name)
+            continue
+
+        if member.issym() or member.islnk():
+            logger.warning("Skipping link member in archive '%s': %s", source, name)
+            continue
+
+        if member.isdir():
+            try:
+                os.makedirs(target_path, exist_ok=True)
+                extracted.append(os.path.relpath(target_path, dest_dir_abs))
+            except OSError as e:
+                logger.warning("Failed to create directory '%s': %s", target_path, e)
+            continue
+
+        # For regular files and others: ensure parent exists, remove conflicting path
+        parent = os.path.dirname(target_path)
+        os.makedirs(parent, exist_ok=True)
+        if os.path.isdir(target_path):
+            try:
+                shutil.rmtree(target_path)
+            except OSError as e:
+                logger.warning("Failed to remove existing directory '%s': %s", target_path, e)
+        elif os.path.exists(target_path):
+            try:
+                os.remove(target_path)
+            except OSError as e:
+                logger.warning("Failed to remove existing file '%s': %s", target_path, e)
 
-            if member.isdir():
-                try:
-                    os.makedirs(target_path, exist_ok=True)
-                    extracted.append(os.path.relpath(target_path, dest_dir_abs))
-                except OSError as e:
-                    logger.warning("Failed to create directory '%s': %s", target_path, e)
+        # Extract file content
+        try:
+            f = tf.extractfile(member)
+            if f is None:
+                # Could be a special member; skip
                 continue
-
-            # For regular files and others: ensure parent exists, remove conflicting path
-            parent = os.path.dirname(target_path)
-            os.makedirs(parent, exist_ok=True)
-            if os.path.isdir(target_path):
-                try:
-                    shutil.rmtree(target_path)
-                except OSError as e:
-                    logger.warning("Failed to remove existing directory '%s': %s", target_path, e)
-            elif os.path.exists(target_path):
-                try:
-                    os.remove(target_path)
-                except OSError as e:
-                    logger.warning("Failed to remove existing file '%s': %s", target_path, e)
-
-            # Extract file content
+            with f as src, open(target_path, "wb") as out:
+                shutil.copyfileobj(src, out, _EXTRACT_COPY_BUFSIZE)
+            # Apply basic permissions if available
             try:
-                f = tf.extractfile(member)
-                if f is None:
-                    # Could be a special member; skip
-                    continue
-                with f as src, open(target_path, "wb") as out:
-                    shutil.copyfileobj(src, out)
-                # Apply basic permissions if available
-                try:
-                    os.chmod(target_path, member.mode)
-                except Exception:
-                    pass
-                extracted.append(os.path.relpath(target_path, dest_dir_abs))
-            except Exception as e:
-                logger.warning("Failed to extract '%s' from '%s': %s", name, archive_path, e)
+                os.chmod(target_path, member.mode)
+            except Exception:
+                pass
+            extracted.append(os.path.relpath(target_path, dest_dir_abs))
+        except Exception as e:
+            logger.warning("Failed to extract '%s' from '%s': %s", name, source, e)
     return extracted
 
 
-def extract_archives_to_input_dir(local_archives: Iterable[str], input_dir: str) -> dict:
-    """Extract a list of .tgz archives into `input_dir` with overwrite.
-
-    Returns a summary dict: {archives, extracted_files}.
-    """
-    input_dir_abs = os.path.abspath(os.path.expanduser(input_dir))
-    os.makedirs(input_dir_abs, exist_ok=True)
-    all_extracted: list[str] = []
-    archives_list = list(local_archives)
-    for archive in archives_list:
-        try:
-            extracted = _safe_extract_tgz(archive, input_dir_abs)
-            all_extracted.extend(extracted)
-            logger.info("Extracted %s into %s (%d entries)", archive, input_dir_abs, len(extracted))
-        except (tarfile.TarError, OSError) as e:
-            logger.error("Failed to extract archive '%s': %s", archive, e)
-    return {"archives": len(archives_list), "extracted_files": len(all_extracted)}
+def _open_archive(key: str):
+    """Open the GetObject stream for `key`; returns None (logged) if it can't be fetched."""
+    try:
+        return s3.get_object(Bucket=bucket_name, Key=key)["Body"]
+    except (BotoCoreError, ClientError) as e:
+        logger.error("Failed to fetch '%s': %s", key, e)
+        return None
 
 
 def initialize_input_dir_from_bucket() -> dict:
     """Initialize a local input directory from .tgz archives stored under a bucket prefix.
 
-    Steps:
-    1) Download all `.tgz` objects under `bucket_dir` into `~/.site-analyzer` (removing duplicates first).
-    2) Extract each archive into `input_dir`, overwriting existing files if necessary.
-
-    Assumptions:
-    - `bucket_dir` is a prefix within the configured bucket (`settings.STORAGE_BUCKET`).
+    Each `.tgz` object under the inputs prefix is streamed from the bucket and extracted
+    into `settings.INPUT_DATA_DIR` (overwriting existing files), with no intermediate
+    archive on disk. Archives are extracted one after another in key order, so when two
+    contain the same member the later key wins; only the next archive's request is
+    opened in the background while the current one is extracted.
 
-    Returns a summary dict: {downloaded, extracted_files}.
+    Returns a summary dict: {archives, downloaded, extracted_files}, where `archives` is
+    the number of keys listed and `downloaded` the number extracted successfully.
     """
-    local_archives = download_tgz_archives(bucket_inputs_dir)
-    extract_summary = extract_archives_to_input_dir(
-        local_archives, settings.INPUT_DATA_DIR.absolute()
-    )
-    return {"downloaded": len(local_archives), **extract_summary}
+    keys = sorted(_list_tgz_keys_under_prefix(bucket_inputs_dir))
+    if not keys:
+        return {"archives": 0, "downloaded": 0, "extracted_files": 0}
+    input_dir_abs = str(settings.INPUT_DATA_DIR.absolute())
+    downloaded = extracted_files = 0
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        pending = prefetch.submit(_open_archive, keys[0])
+        for i, key in enumerate(keys):
+            body = pending.result()
+            if i + 1 < len(keys):
+                pending = prefetch.submit(_open_archive, keys[i + 1])
+            if body is None:
+                continue
+            try:
+                extracted = extract_tgz_from_s3(key, input_dir_abs, body)
+            except (BotoCoreError, ClientError, tarfile.TarError, OSError) as e:
+                logger.error("Failed to stream-extract '%s': %s", key, e)
+                continue
+            logger.info("Extracted %s into %s (%d entries)", key, input_dir_abs, len(extracted))
+            downloaded += 1
+            extracted_files += len(extracted)
+    return {"archives": len(keys), "downloaded": downloaded, "extracted_files": extracted_files}
@@ -1,22 +1,24 @@
-import json
 import logging
+from collections.abc import Iterable
 from datetime import UTC, datetime
 
 from fastapi import BackgroundTasks, HTTPException
-from pydantic.json import pydantic_encoder
-from sqlmodel import Session, delete, select
+from pydantic import TypeAdapter
+from sqlmodel import Session, delete, select, update
 
 from app.core import storage
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.security import dummy_verify_password, get_password_hash, verify_password
 from app.db.pagination import paginate
 from app.gis.processor import process_map_task
 from app.models import (
+    ConstraintFactor,
     CreateMapTaskReq,
     MapTaskDB,
     MapTaskFileDB,
     MapTaskProgressDB,
     MapTaskStatus,
+    SuitabilityFactor,
     UserCreate,
     UserDB,
     UserRole,
@@ -75,9 +77,17 @@ def get_user_by_email(*, session: Session, email: str) -> UserDB | None:
 
 
 def get_user_by_id(*, session: Session, user_id: int) -> UserDB | None:
-    """Fetch a user by primary key id."""
-    statement = select(UserDB).where(UserDB.id == user_id)
-    return session.exec(statement).first()
+    """Fetch a user by primary key id (served from the session's identity map if loaded)."""
+    return session.get(UserDB, user_id)
+
+
+def get_user_emails_by_ids(*, session: Session, user_ids: Iterable[int]) -> dict[int, str]:
+    """Fetch the emails of several users in one query, keyed by user id."""
+    ids = set(user_ids)
+    if not ids:
+        return {}
+    statement = select(UserDB.id, UserDB.email).where(UserDB.id.in_(ids))
+    return dict(session.exec(statement).all())
 
 
 def get_files_by_id(
@@ -90,6 +100,14 @@ def get_files_by_id(
     return session.exec(statement).all()
 
 
+def get_files_by_task_ids(*, session: Session, map_task_ids: list[int]) -> list[MapTaskFileDB]:
+    """Fetch the files of several map tasks in one query (callers own the task ids)."""
+    if not map_task_ids:
+        return []
+    statement = select(MapTaskFileDB).where(MapTaskFileDB.map_task_id.in_(map_task_ids))
+    return list(session.exec(statement).all())
+
+
 def get_file_by_conditions(
     *, session: Session, map_task_id: int, file_type: str
 ) -> MapTaskFileDB | None:
@@ -105,6 +123,8 @@ def authenticate(*, session: Session, email: str, password: str) -> UserDB | Non
     db_user = get_user_by_email(session=session, email=email)
     # print("Authenticating user...", db_user)
     if not db_user:
+        # Burn a bcrypt check anyway so unknown emails can't be told apart by timing
+        dummy_verify_password(password)
         return None
     if not verify_password(password, db_user.password_hash):
         return None
@@ -125,6 +145,11 @@ def authenticate(*, session: Session, email: str, password: str) -> UserDB | Non
 #     return db_item
 
 
+# Factor lists are stored as JSON text; serialized by pydantic-core in one call
+_CONSTRAINT_FACTORS_JSON = TypeAdapter(list[ConstraintFactor])
+_SUITABILITY_FACTORS_JSON = TypeAdapter(list[SuitabilityFactor])
+
+
 def create_map_task(
     *,
     session: Session,
@@ -144,10 +169,12 @@ def create_map_task(
             "user_id": user_id,
             "status": MapTaskStatus.PENDING,
             "district": payload.district_code,
-            "constraint_factors": json.dumps(payload.constraint_factors, default=pydantic_encoder),
-            "suitability_factors": json.dumps(
-                payload.suitability_factors, default=pydantic_encoder
-            ),
+            "constraint_factors": _CONSTRAINT_FACTORS_JSON.dump_json(
+                payload.constraint_factors
+            ).decode(),
+            "suitability_factors": _SUITABILITY_FACTORS_JSON.dump_json(
+                payload.suitability_factors
+            ).decode(),
         },
     )
     session.add(db_obj)
@@ -163,11 +190,11 @@ def create_map_task(
 
 def get_map_task(*, session: Session, user_id: int, task_id: int) -> MapTaskDB | None:
     """Fetch a map task by id for the given user."""
-    statement = select(MapTaskDB).where(
-        MapTaskDB.id == task_id,
-        MapTaskDB.user_id == user_id,
-    )
-    return session.exec(statement).first()
+    # Primary-key get consults the identity map first; ownership is checked on the row
+    db_obj = session.get(MapTaskDB, task_id)
+    if db_obj is None or db_obj.user_id != user_id:
+        return None
+    return db_obj
 
 
 def cancel_map_task(*, session: Session, user_id: int, task_id: int) -> MapTaskDB | None:
@@ -186,6 +213,11 @@ def cancel_map_task(*, session: Session, user_id: int, task_id: int) -> MapTaskD
     return db_obj
 
 
+# Status groups behind list_map_tasks' `completed` filter
+_COMPLETED_STATUSES = (MapTaskStatus.SUCCESS, MapTaskStatus.FAILURE, MapTaskStatus.CANCELLED)
+_ACTIVE_STATUSES = (MapTaskStatus.PENDING, MapTaskStatus.PROCESSING)
+
+
 def list_map_tasks(
     *, session: Session, user_id: int, completed: bool | None = None
 ) -> list[MapTaskDB]:
@@ -197,35 +229,35 @@ def list_map_tasks(
     """
     statement = select(MapTaskDB).where(MapTaskDB.user_id == user_id)
     if completed is True:
-        statement = statement.where(
-            MapTaskDB.status.in_(
-                [
-                    MapTaskStatus.SUCCESS,
-                    MapTaskStatus.FAILURE,
-                    MapTaskStatus.CANCELLED,
-                ]
-            )
-        )
+        statement = statement.where(MapTaskDB.status.in_(_COMPLETED_STATUSES))
     elif completed is False:
-        statement = statement.where(
-            MapTaskDB.status.in_(
-                [
-                    MapTaskStatus.PENDING,
-                    MapTaskStatus.PROCESSING,
-                ]
-            )
-        )
+        statement = statement.where(MapTaskDB.status.in_(_ACTIVE_STATUSES))
     # Order by newest first
     statement = statement.order_by(MapTaskDB.created_at.desc())
     return list(session.exec(statement).all())
 
 
-def delete_map_task(*, session: Session, user_id: int, task_id: int) -> MapTaskDB | None:
+def _delete_storage_keys(keys: list[str]) -> None:
+    """Best-effort removal of task artifacts from object storage."""
+    try:
+        storage.delete_files(keys)
+    except Exception:
+        logger.warning("Failed to delete files from storage")
+
+
+def delete_map_task(
+    *,
+    session: Session,
+    user_id: int,
+    task_id: int,
+    background_tasks: BackgroundTasks | None = None,
+) -> MapTaskDB | None:
     """Delete a user's map task if it exists and is not running.
 
     Returns the deleted task object (pre-delete) or None if not found.
     Raises ValueError if the task is still pending/processing and cannot be deleted safely.
-    Also removes related files and progress rows when present.
+    Also removes related files and progress rows when present. Stored artifacts are
+    deleted after the commit; with `background_tasks` that happens after the response.
     """
     if settings.RELEASE_READ_ONLY:
         raise HTTPException(
@@ -238,35 +270,31 @@ def delete_map_task(*, session: Session, user_id: int, task_id: int) -> MapTaskD
     if db_obj.status in (MapTaskStatus.PENDING, MapTaskStatus.PROCESSING):
         raise ValueError("Cannot delete a running task; cancel it first")
 
-    # Fetch related file rows BEFORE deletion for storage cleanup
-    file_rows: list[MapTaskFileDB] = []
+    # Fetch related file keys BEFORE deletion for storage cleanup (MySQL has no
+    # DELETE ... RETURNING, so this stays a separate read in the same transaction)
+    file_paths: list[str | None] = []
+    fetched_ok = False
     try:
-        stmt_files = select(MapTaskFileDB).where(
+        stmt_files = select(MapTaskFileDB.file_path).where(
             MapTaskFileDB.user_id == user_id,
             MapTaskFileDB.map_task_id == db_obj.id,
         )
-        file_rows = list(session.exec(stmt_files).all())
+        file_paths = list(session.exec(stmt_files).all())
+        fetched_ok = True
     except Exception:
         logger.warning("Failed to fetch file rows for cleanup")
-        file_rows = []
-
-    # Attempt object storage deletion (best-effort, non-blocking)
-    try:
-        keys = [r.file_path for r in file_rows if r.file_path]
-        if keys:
-            storage.delete_files(keys)
-    except Exception:
-        logger.warning("Failed to delete files from storage")
-        pass
+        file_paths = []
 
-    # Clean up related DB rows (best-effort; no cascading) then task
+    # Clean up related DB rows (best-effort; no cascading) then task. The file DELETE
+    # is only skipped when the read succeeded and found no rows.
     try:
-        session.exec(
-            delete(MapTaskFileDB).where(
-                MapTaskFileDB.user_id == user_id,
-                MapTaskFileDB.map_task_id == db_obj.id,
+        if file_paths or not fetched_ok:
+            session.exec(
+                delete(MapTaskFileDB).where(
+                    MapTaskFileDB.user_id == user_id,
+                    MapTaskFileDB.map_task_id == db_obj.id,
+                )
             )
-        )
         session.exec(
             delete(MapTaskProgressDB).where(
                 MapTaskProgressDB.user_id == user_id,
@@ -279,6 +307,14 @@ def delete_map_task(*, session: Session, user_id: int, task_id: int) -> MapTaskD
 
     session.delete(db_obj)
     session.commit()
+
+    # Object storage cleanup (best-effort) once the rows are gone
+    keys = [path for path in file_paths if path]
+    if keys:
+        if background_tasks is not None:
+            background_tasks.add_task(_delete_storage_keys, keys)
+        else:
+            _delete_storage_keys(keys)
     return db_obj
 
 
@@ -348,8 +384,7 @@ def admin_get_map_task_progress(*, session: Session, task_id: int) -> list[MapTa
 
 def admin_get_map_task(*, session: Session, task_id: int) -> MapTaskDB | None:
     """Fetch a map task by id without user restriction (admin scope)."""
-    statement = select(MapTaskDB).where(MapTaskDB.id == task_id)
-    return session.exec(statement).first()
+    return session.get(MapTaskDB, task_id)
 
 
 def admin_list_users(
@@ -369,8 +404,8 @@ def admin_list_users(
 
     # Filters
     if keyword:
-        kw = f"%{keyword.strip()}%"
-        stmt = stmt.where(UserDB.email.like(kw))
+        # autoescape: '%' and '_' in the keyword match literally, not as wildcards
+        stmt = stmt.where(UserDB.email.contains(keyword.strip(), autoescape=True))
     if status is not None:
         stmt = stmt.where(UserDB.status == status)
 
@@ -393,12 +428,17 @@ def admin_list_map_tasks(
     name: str | None = None,
     user_id: int | None = None,
     status: int | None = None,
-) -> tuple[list[MapTaskDB], int, int, int]:
-    """List map tasks for admin with pagination and optional filters."""
-    stmt = select(MapTaskDB)
+) -> tuple[list[tuple[MapTaskDB, str | None]], int, int, int]:
+    """List map tasks for admin with pagination and optional filters.
+
+    Rows are (MapTaskDB, owner_email) tuples; the owner's email is joined in the same
+    query so callers don't need a per-row user lookup.
+    """
+    stmt = select(MapTaskDB, UserDB.email).join(
+        UserDB, UserDB.id == MapTaskDB.user_id, isouter=True
+    )
     if name:
-        kw = f"%{name.strip()}%"
-        stmt = stmt.where(MapTaskDB.name.like(kw))
+        stmt = stmt.where(MapTaskDB.name.contains(name.strip(), autoescape=True))
     if user_id is not None:
         stmt = stmt.where(MapTaskDB.user_id == user_id)
     if status is not None:
@@ -414,26 +454,27 @@ def admin_list_map_tasks(
     return rows, total, ps, cp
 
 
-def admin_update_user_status(
-    *, session: Session, target_user_id: int, status: int
-) -> UserDB | None:
+def admin_update_user_status(*, session: Session, target_user_id: int, status: int) -> bool:
     """Update a user's status (admin only action).
 
-    Validates status against UserStatus enum. Returns updated user or None if not found.
-    Raises ValueError for invalid status input.
+    Returns True if the user now has the status (changed, or already set) and False if
+    the user doesn't exist or is an admin, whose status is never changed.
     """
-    # Fetch target user
-    stmt = select(UserDB).where(UserDB.id == target_user_id)
-    user = session.exec(stmt).first()
-    if not user:
-        return None
-    if user.role == UserRole.ADMIN:
-        return None  # Do not allow changing admin status
-    # Update and persist only if changed
     new_status = int(status)
-    if user.status != new_status:
-        user.status = new_status
-        session.add(user)
+    # One conditional UPDATE: admins are never changed, unchanged rows aren't rewritten.
+    # Users already loaded in this session are synchronized in Python, without a SELECT.
+    result = session.exec(
+        update(UserDB)
+        .where(
+            UserDB.id == target_user_id,
+            UserDB.role != UserRole.ADMIN,
+            UserDB.status != new_status,
+        )
+        .values(status=new_status)
+    )
+    if result.rowcount:
         session.commit()
-        session.refresh(user)
-    return user
+        return True
+    # Nothing updated: unknown user, an admin, or the status was already set
+    user = session.get(UserDB, target_user_id)
+    return user is not None and user.role != UserRole.ADMIN
@@ -58,11 +58,6 @@ def paginate(
     """
     ps, cp, offset = normalize_pagination(page_size, current_page)
 
-    # Count on a subquery to preserve filters without LIMIT/OFFSET/ORDER
-    # Construct count as select(func.count()).select_from(subquery)
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = _scalar_count(session, count_stmt)
-
     stmt = base_stmt
     if order_by is not None:
         # Apply ordering if provided
@@ -74,4 +69,14 @@ def paginate(
     stmt = stmt.offset(offset).limit(ps)
     # Execute and fetch rows
     rows = list(session.exec(stmt).all())
+
+    # A partial page that is not past the end is the last page, so the total follows
+    # from the offset and no COUNT round-trip is needed
+    if len(rows) < ps and (rows or offset == 0):
+        return rows, offset + len(rows), ps, cp
+
+    # Count on a subquery to preserve filters without LIMIT/OFFSET/ORDER
+    # Construct count as select(func.count()).select_from(subquery)
+    count_stmt = select(func.count()).select_from(base_stmt.subquery())
+    total = _scalar_count(session, count_stmt)
     return rows, int(total), ps, cp
@@ -7,11 +7,11 @@ import shutil
 from datetime import UTC, datetime
 from pathlib import Path
 
-from sqlmodel import Session, select
+from sqlmodel import select
 
 from app.core import storage
 from app.core.config import settings
-from app.core.db import engine as db_engine
+from app.core.db import SessionLocal
 from app.gis.engine import SiteSuitabilityEngine
 from app.gis.engine_models import (
     EngineConfigs,
@@ -50,7 +50,7 @@ class MapTaskMonitor:
         return 0 if iv < 0 else 100 if iv > 100 else iv
 
     def is_cancelled(self) -> bool:
-        with Session(db_engine) as session:
+        with SessionLocal() as session:
             stmt = select(MapTaskDB).where(MapTaskDB.id == self.task_id)
             obj = session.exec(stmt).first()
             if not obj:
@@ -67,7 +67,7 @@ class MapTaskMonitor:
         desc = (description or "").strip() or None
 
         try:
-            with Session(db_engine) as session:
+            with SessionLocal() as session:
                 row = MapTaskProgressDB(
                     map_task_id=self.task_id,
                     user_id=self.user_id,
@@ -95,7 +95,7 @@ class MapTaskMonitor:
         p = None if percent is None else self._clamp_percent(percent)
 
         try:
-            with Session(db_engine) as session:
+            with SessionLocal() as session:
                 row = MapTaskProgressDB(
                     map_task_id=self.task_id,
                     user_id=self.user_id,
@@ -113,7 +113,7 @@ class MapTaskMonitor:
         """Record a generated file by copying to storage and inserting a DB row."""
         new_file_path = storage.save_task_file(file_path, self.user_id, self.task_id)
         try:
-            with Session(db_engine) as session:
+            with SessionLocal() as session:
                 row = MapTaskFileDB(
                     map_task_id=self.task_id,
                     user_id=self.user_id,
@@ -129,7 +129,7 @@ class MapTaskMonitor:
 
 def _quick_update_task(task_id: int, **fields) -> None:
     """Update a MapTaskDB row with minimal session lifetime."""
-    with Session(db_engine) as session:
+    with SessionLocal() as session:
         stmt = select(MapTaskDB).where(MapTaskDB.id == task_id)
         obj = session.exec(stmt).first()
         if not obj:
@@ -142,7 +142,7 @@ def _quick_update_task(task_id: int, **fields) -> None:
 
 def _load_task(task_id: int) -> MapTaskDB | None:
     """Load a MapTaskDB row by ID."""
-    with Session(db_engine) as session:
+    with SessionLocal() as session:
         stmt = select(MapTaskDB).where(MapTaskDB.id == task_id)
         return session.exec(stmt).first()
 
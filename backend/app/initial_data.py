@@ -1,8 +1,6 @@
 import logging
 
-from sqlmodel import Session
-
-from app.core.db import engine
+from app.core.db import SessionLocal
 from app.core.db_init import init_db
 
 logging.basicConfig(level=logging.INFO)
@@ -11,7 +9,7 @@ logger = logging.getLogger(__name__)
 
 def init() -> None:
     """Initialize the database with initial data."""
-    with Session(engine) as session:
+    with SessionLocal() as session:
         init_db(session)
 
 
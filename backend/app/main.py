@@ -1,6 +1,11 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 
 from app import initial_data
 from app.api.main import api_router
@@ -12,7 +17,18 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # DB-bound routes are sync `def` handlers run in AnyIO's threadpool; raise its
+    # default limit of 40 so a burst of slow queries doesn't queue everything else
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_MAX_WORKERS
+    initial_data.main()
+    yield
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
@@ -28,13 +44,11 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+# Task lists carry long presigned URLs; compress anything past a small body
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 log_bucket_meta_info()
 
 print_settings_info()
-
-
-@app.on_event("startup")
-def on_startup() -> None:
-    initial_data.main()
@@ -11,6 +11,8 @@ from sqlalchemy import BigInteger, Column, DateTime
 from sqlalchemy.sql import func
 from sqlmodel import Field, SQLModel
 
+from app.db.types import UTCDateTime
+
 # Validation constants from GIS module
 from app.gis.consts import (
     ALLOWED_CONSTRAINTS,
@@ -529,9 +531,11 @@ class MapTaskProgressDB(SQLModel, table=True):
     description: str | None = Field(default=None, max_length=255)
     phase: str | None = Field(default=None, max_length=50)
     error_msg: str | None = Field(default=None, max_length=255)
+    # Read back as aware UTC, so progress rows need no per-row timezone fix-up
     created_at: datetime | None = Field(
-        default=None, sa_column=Column(DateTime, server_default=func.now())
+        default=None, sa_column=Column(UTCDateTime, server_default=func.now())
     )
     updated_at: datetime | None = Field(
-        default=None, sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+        default=None,
+        sa_column=Column(UTCDateTime, server_default=func.now(), onupdate=func.now()),
     )
@@ -1,10 +1,17 @@
+import http.client
+import inspect
+from email import message_from_string
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import requests
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from requests.cookies import extract_cookies_to_jar
 
 from app.api import deps as deps_module
 from app.api.main import api_router
+from app.api.routes import auth as auth_routes
 from app.models import UserRole, UserStatus
 
 
@@ -105,7 +112,7 @@ def test_oidc_token_missing_id_token():
         def json(self):
             return {"access_token": "abc", "token_type": "bearer"}
 
-    with patch("app.api.routes.auth.requests.post", return_value=Resp()):
+    with patch("app.api.routes.auth._google_http.post", return_value=Resp()):
         r = client.post("/oidc-token", json={"code": "dummy"})
         assert r.status_code == 400
 
@@ -121,7 +128,7 @@ def test_oidc_token_exchange_error():
         def json(self):
             return {}
 
-    with patch("app.api.routes.auth.requests.post", return_value=Resp()):
+    with patch("app.api.routes.auth._google_http.post", return_value=Resp()):
         r = client.post("/oidc-token", json={"code": "dummy"})
         assert r.status_code == 400
 
@@ -137,7 +144,11 @@ def test_oidc_token_invalid_jwt_decode():
             return {"id_token": "xyz"}
 
     with (
-        patch("app.api.routes.auth.requests.post", return_value=Resp()),
+        patch("app.api.routes.auth._google_http.post", return_value=Resp()),
+        patch(
+            "app.api.routes.auth._google_jwks.get_signing_key_from_jwt",
+            return_value=MagicMock(key="google-key"),
+        ),
         patch("app.api.routes.auth.jwt.decode", side_effect=Exception("bad token")),
     ):
         r = client.post("/oidc-token", json={"code": "dummy"})
@@ -156,9 +167,13 @@ def test_oidc_token_success_flow():
 
     decoded = {"email": "g@example.com", "sub": "sub123", "email_verified": True}
     user_obj = MagicMock(id=2, role=UserRole.USER, status=UserStatus.ACTIVE)
+    signing_key = MagicMock(key="google-key")
     with (
-        patch("app.api.routes.auth.requests.post", return_value=Resp()),
-        patch("app.api.routes.auth.jwt.decode", return_value=decoded),
+        patch("app.api.routes.auth._google_http.post", return_value=Resp()),
+        patch(
+            "app.api.routes.auth._google_jwks.get_signing_key_from_jwt", return_value=signing_key
+        ),
+        patch("app.api.routes.auth.jwt.decode", return_value=decoded) as decode,
         patch("app.api.routes.auth.crud.get_user_by_email", return_value=None),
         patch("app.api.routes.auth.crud.create_user", return_value=user_obj),
         patch("app.api.routes.auth.crud.touch_last_login", return_value=user_obj),
@@ -168,3 +183,47 @@ def test_oidc_token_success_flow():
         assert r.status_code == 200
         body = r.json()
         assert body["access_token"] == "tok"
+        # The id_token signature, audience and issuer are verified against Google's key
+        args, kwargs = decode.call_args
+        assert args == ("xyz", "google-key")
+        assert kwargs["algorithms"] == ["RS256"]
+        assert "audience" in kwargs and "issuer" in kwargs
+
+
+def test_oidc_token_rejects_unverifiable_id_token():
+    app = _make_app_for_auth()
+    client = TestClient(app)
+
+    class Resp:
+        status_code = 200
+
+        def json(self):
+            return {"id_token": "not-a-jwt"}
+
+    # A malformed token fails before any key is fetched
+    with patch("app.api.routes.auth._google_http.post", return_value=Resp()):
+        r = client.post("/oidc-token", json={"code": "dummy"})
+        assert r.status_code == 400
+
+
+def test_password_hashing_handlers_run_in_threadpool():
+    # bcrypt work must not run on the event loop: these handlers stay plain `def`
+    # so FastAPI dispatches them to its threadpool
+    for handler in (auth_routes.user_login, auth_routes.user_register, auth_routes.get_oidc_token):
+        assert not inspect.iscoroutinefunction(handler), handler.__name__
+
+
+def test_google_http_session_keeps_no_cookies():
+    """The shared code-exchange session must not carry cookies between users' logins."""
+    msg = message_from_string("Set-Cookie: sid=abc; Path=/\n\n", _class=http.client.HTTPMessage)
+    raw = SimpleNamespace(_original_response=SimpleNamespace(msg=msg))
+    req = requests.Request("POST", "https://oauth2.googleapis.com/token").prepare()
+
+    plain = requests.Session()
+    extract_cookies_to_jar(plain.cookies, req, raw)
+    assert len(plain.cookies) == 1
+
+    shared = auth_routes._build_google_http()
+    extract_cookies_to_jar(shared.cookies, req, raw)
+    assert len(shared.cookies) == 0
+    assert shared.get_adapter("https://oauth2.googleapis.com")._pool_maxsize == 20
@@ -4,6 +4,7 @@ Unit tests for app.api.deps module.
 Tests dependency injection functions for authentication, authorization, database sessions.
 """
 
+import time
 from unittest.mock import Mock, patch
 
 import jwt
@@ -20,12 +21,28 @@ with patch("app.crud.get_user_by_id"), patch("app.crud.process_map_task"):
         CurrentUser,
         SessionDep,
         TokenDep,
+        get_admin_token_payload,
         get_current_active_admin,
         get_current_user,
         get_db,
     )
     from app.models import TokenPayload, UserDB, UserRole, UserStatus
 
+# Admin claim as resolved by get_admin_token_payload before get_current_active_admin runs
+_ADMIN_CLAIM = TokenPayload(sub="123", admin=True)
+
+
+@pytest.fixture(autouse=True)
+def _clear_auth_caches():
+    """Isolate tests from tokens and users cached by earlier tests."""
+    from app.api import deps
+
+    deps._token_cache.clear()
+    deps._user_cache.clear()
+    yield
+    deps._token_cache.clear()
+    deps._user_cache.clear()
+
 
 class TestGetDb:
     """Test database session dependency."""
@@ -48,6 +65,8 @@ class TestGetDb:
 
         # Verify it's a Session instance
         assert isinstance(session, Session)
+        # Sessions come from the shared factory and keep objects loaded after commit
+        assert session.expire_on_commit is False
 
         # Verify we can close the generator
         try:
@@ -64,15 +83,14 @@ class TestGetCurrentUser:
         """Test successful user authentication with valid token."""
         # Setup mocks
         mock_session = Mock(spec=Session)
-        mock_user = Mock(spec=UserDB)
-        mock_user.status = UserStatus.ACTIVE
+        mock_user = _make_user()
         mock_session.get.return_value = mock_user
 
         # Mock JWT decode
         mock_payload = {"sub": "123", "admin": False}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -88,7 +106,7 @@ class TestGetCurrentUser:
         """Test authentication failure with invalid token format."""
         mock_session = Mock(spec=Session)
 
-        with patch("app.api.deps.jwt.decode", side_effect=InvalidTokenError("Invalid token")):
+        with patch("app.api.deps._jwt.decode", side_effect=InvalidTokenError("Invalid token")):
             with pytest.raises(HTTPException) as exc_info:
                 get_current_user(mock_session, "invalid_token")
 
@@ -103,7 +121,7 @@ class TestGetCurrentUser:
         mock_payload = {"invalid": "payload"}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -124,7 +142,7 @@ class TestGetCurrentUser:
         mock_payload = {"sub": "123", "admin": False}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -140,14 +158,13 @@ class TestGetCurrentUser:
     def test_get_current_user_inactive_user(self):
         """Test authentication failure for inactive user."""
         mock_session = Mock(spec=Session)
-        mock_user = Mock(spec=UserDB)
-        mock_user.status = UserStatus.LOCKED
+        mock_user = _make_user(UserStatus.LOCKED)
         mock_session.get.return_value = mock_user
 
         mock_payload = {"sub": "123", "admin": False}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -163,14 +180,13 @@ class TestGetCurrentUser:
     def test_get_current_user_with_admin_token(self):
         """Test successful authentication with admin token."""
         mock_session = Mock(spec=Session)
-        mock_user = Mock(spec=UserDB)
-        mock_user.status = UserStatus.ACTIVE
+        mock_user = _make_user()
         mock_session.get.return_value = mock_user
 
         mock_payload = {"sub": "456", "admin": True}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -185,14 +201,13 @@ class TestGetCurrentUser:
     def test_get_current_user_string_subject_conversion(self):
         """Test that subject is properly converted to int for database lookup."""
         mock_session = Mock(spec=Session)
-        mock_user = Mock(spec=UserDB)
-        mock_user.status = UserStatus.ACTIVE
+        mock_user = _make_user()
         mock_session.get.return_value = mock_user
 
         mock_payload = {"sub": "789", "admin": False}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -214,7 +229,7 @@ class TestGetCurrentActiveAdmin:
         mock_user = Mock(spec=UserDB)
         mock_user.role = UserRole.ADMIN
 
-        result = get_current_active_admin(mock_user)
+        result = get_current_active_admin(_ADMIN_CLAIM, mock_user)
 
         assert result == mock_user
 
@@ -224,7 +239,7 @@ class TestGetCurrentActiveAdmin:
         mock_user.role = UserRole.USER
 
         with pytest.raises(HTTPException) as exc_info:
-            get_current_active_admin(mock_user)
+            get_current_active_admin(_ADMIN_CLAIM, mock_user)
 
         assert exc_info.value.status_code == 403
         assert exc_info.value.detail == "The user doesn't have enough privileges"
@@ -235,7 +250,7 @@ class TestGetCurrentActiveAdmin:
         mock_user.role = None
 
         with pytest.raises(HTTPException) as exc_info:
-            get_current_active_admin(mock_user)
+            get_current_active_admin(_ADMIN_CLAIM, mock_user)
 
         assert exc_info.value.status_code == 403
         assert exc_info.value.detail == "The user doesn't have enough privileges"
@@ -246,11 +261,43 @@ class TestGetCurrentActiveAdmin:
         mock_user.role = 999  # Invalid role value
 
         with pytest.raises(HTTPException) as exc_info:
-            get_current_active_admin(mock_user)
+            get_current_active_admin(_ADMIN_CLAIM, mock_user)
+
+        assert exc_info.value.status_code == 403
+        assert exc_info.value.detail == "The user doesn't have enough privileges"
+
 
+class TestGetAdminTokenPayload:
+    """Test the admin-claim gate that runs before the user lookup."""
+
+    def test_admin_claim_passes(self):
+        """Test a token carrying the admin claim is accepted."""
+        payload = {"sub": "123", "admin": True, "exp": time.time() + 60}
+        with patch("app.api.deps._jwt.decode", return_value=payload):
+            token_data = get_admin_token_payload("admin_token")
+        assert token_data.admin is True
+
+    def test_non_admin_claim_rejected(self):
+        """Test a token without the admin claim is rejected with 403."""
+        payload = {"sub": "123", "admin": False, "exp": time.time() + 60}
+        with (
+            patch("app.api.deps._jwt.decode", return_value=payload),
+            pytest.raises(HTTPException) as exc_info,
+        ):
+            get_admin_token_payload("user_token")
         assert exc_info.value.status_code == 403
         assert exc_info.value.detail == "The user doesn't have enough privileges"
 
+    def test_invalid_token_rejected(self):
+        """Test an unverifiable token is rejected as bad credentials."""
+        with (
+            patch("app.api.deps._jwt.decode", side_effect=InvalidTokenError("bad")),
+            pytest.raises(HTTPException) as exc_info,
+        ):
+            get_admin_token_payload("bad_token")
+        assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+        assert exc_info.value.detail == "Could not validate credentials"
+
 
 class TestOAuth2Configuration:
     """Test OAuth2 configuration and dependencies."""
@@ -281,6 +328,183 @@ class TestOAuth2Configuration:
         assert CurrentAdminUser is not None
 
 
+class TestTokenCache:
+    """Test memoization of decoded tokens in get_current_user."""
+
+    def _make_session(self):
+        mock_session = Mock(spec=Session)
+        mock_session.get.return_value = _make_user()
+        return mock_session
+
+    def test_repeat_token_skips_decode(self):
+        """Test that a token with a future exp is decoded only once."""
+        mock_session = self._make_session()
+        mock_payload = {"sub": "123", "admin": False, "exp": time.time() + 60}
+
+        with patch("app.api.deps._jwt.decode", return_value=mock_payload) as decode_mock:
+            get_current_user(mock_session, "cached_token")
+            get_current_user(mock_session, "cached_token")
+
+        decode_mock.assert_called_once()
+
+    def test_expired_cache_entry_is_revalidated(self):
+        """Test that an entry past its exp is dropped and the token re-verified."""
+        mock_session = self._make_session()
+        mock_payload = {"sub": "123", "admin": False, "exp": time.time() + 60}
+
+        with patch("app.api.deps._jwt.decode", return_value=mock_payload):
+            get_current_user(mock_session, "expiring_token")
+
+        with (
+            patch("app.api.deps.time.time", return_value=mock_payload["exp"] + 1),
+            patch("app.api.deps._jwt.decode", side_effect=jwt.ExpiredSignatureError("expired")),
+            pytest.raises(HTTPException) as exc_info,
+        ):
+            get_current_user(mock_session, "expiring_token")
+
+        assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_real_token_round_trip_and_required_claims(self):
+        """Test the shared decoder accepts issued tokens and rejects ones missing exp."""
+        from datetime import timedelta
+
+        from app.core import security
+        from app.core.config import settings
+
+        mock_session = self._make_session()
+        token = security.create_access_token(123, False, expires_delta=timedelta(minutes=5))
+        assert get_current_user(mock_session, token).id == 123
+
+        no_exp = jwt.encode({"sub": "123"}, settings.SECRET_KEY, algorithm=security.ALGORITHM)
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(mock_session, no_exp)
+        assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_token_without_exp_is_not_cached(self):
+        """Test that tokens lacking an exp claim are always decoded."""
+        mock_session = self._make_session()
+        mock_payload = {"sub": "123", "admin": False}
+
+        with patch("app.api.deps._jwt.decode", return_value=mock_payload) as decode_mock:
+            get_current_user(mock_session, "no_exp_token")
+            get_current_user(mock_session, "no_exp_token")
+
+        assert decode_mock.call_count == 2
+
+    def test_cache_is_bounded(self):
+        """Test that the cache never grows beyond its configured size."""
+        mock_session = self._make_session()
+        mock_payload = {"sub": "123", "admin": False, "exp": time.time() + 60}
+
+        with (
+            patch("app.api.deps._TOKEN_CACHE_MAXSIZE", 2),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
+        ):
+            for i in range(5):
+                get_current_user(mock_session, f"token-{i}")
+
+        from app.api import deps
+
+        assert list(deps._token_cache) == ["token-3", "token-4"]
+
+
+def _make_user(status: int = UserStatus.ACTIVE) -> UserDB:
+    return UserDB(
+        id=123,
+        email="user@example.com",
+        password_hash="hashed",
+        provider="local",
+        sub="user@example.com",
+        role=UserRole.USER,
+        status=status,
+    )
+
+
+class TestUserCache:
+    """Test caching of the authenticated user lookup."""
+
+    def _call(self, mock_session, sub: str = "123"):
+        with patch("app.api.deps._jwt.decode", return_value={"sub": sub, "admin": False}):
+            return get_current_user(mock_session, f"token-{sub}")
+
+    def test_repeat_lookup_served_from_cache(self):
+        """Test that a second request for the same user skips session.get."""
+        mock_session = Mock(spec=Session)
+        db_user = _make_user()
+        mock_session.get.return_value = db_user
+
+        assert self._call(mock_session) == db_user
+        cached = self._call(mock_session)
+
+        mock_session.get.assert_called_once_with(UserDB, 123)
+        assert cached == db_user
+
+    def test_miss_returns_detached_copy(self):
+        """Test that a cache miss also returns a copy, not the session-bound instance."""
+        mock_session = Mock(spec=Session)
+        db_user = _make_user()
+        mock_session.get.return_value = db_user
+
+        loaded = self._call(mock_session)
+
+        assert loaded is not db_user
+        assert loaded == db_user
+
+    def test_cache_hits_return_independent_copies(self):
+        """Test that cached users are never shared between requests."""
+        mock_session = Mock(spec=Session)
+        db_user = _make_user()
+        mock_session.get.return_value = db_user
+
+        self._call(mock_session)
+        first = self._call(mock_session)
+        second = self._call(mock_session)
+
+        assert first is not db_user
+        assert first is not second
+        first.status = UserStatus.LOCKED
+        assert second.status == UserStatus.ACTIVE
+        assert self._call(mock_session).status == UserStatus.ACTIVE
+
+    def test_missing_user_is_not_cached(self):
+        """Test that a not-found lookup is retried on the next request."""
+        mock_session = Mock(spec=Session)
+        mock_session.get.return_value = None
+
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                self._call(mock_session)
+
+        assert mock_session.get.call_count == 2
+
+    def test_invalidate_forces_reload(self):
+        """Test that invalidate_cached_user drops the cached entry."""
+        from app.api.deps import invalidate_cached_user
+
+        mock_session = Mock(spec=Session)
+        mock_session.get.side_effect = [_make_user(), _make_user(UserStatus.LOCKED)]
+
+        self._call(mock_session)
+        invalidate_cached_user(123)
+
+        with pytest.raises(HTTPException) as exc_info:
+            self._call(mock_session)
+        assert exc_info.value.detail == "Inactive user"
+
+    def test_entry_expires_after_ttl(self):
+        """Test that cached users are reloaded once the TTL elapses."""
+        from app.api.deps import _USER_CACHE_TTL_SECONDS
+
+        mock_session = Mock(spec=Session)
+        mock_session.get.return_value = _make_user()
+
+        self._call(mock_session)
+        with patch("app.api.deps.time.time", return_value=time.time() + _USER_CACHE_TTL_SECONDS):
+            self._call(mock_session)
+
+        assert mock_session.get.call_count == 2
+
+
 class TestTokenPayloadValidation:
     """Test TokenPayload model validation in authentication flow."""
 
@@ -325,16 +549,14 @@ class TestIntegrationScenarios:
         mock_session = Mock(spec=Session)
 
         # Setup user mock
-        mock_user = Mock(spec=UserDB)
-        mock_user.status = UserStatus.ACTIVE
-        mock_user.role = UserRole.USER
+        mock_user = _make_user()
         mock_session.get.return_value = mock_user
 
         # Setup JWT mock
         mock_payload = {"sub": "123", "admin": False}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -365,7 +587,7 @@ class TestIntegrationScenarios:
         """Test error handling chain from invalid token to HTTP exception."""
         mock_session = Mock(spec=Session)
 
-        with patch("app.api.deps.jwt.decode", side_effect=InvalidTokenError("Malformed token")):
+        with patch("app.api.deps._jwt.decode", side_effect=InvalidTokenError("Malformed token")):
             with pytest.raises(HTTPException) as exc_info:
                 get_current_user(mock_session, "malformed_token")
 
@@ -379,7 +601,7 @@ class TestIntegrationScenarios:
         mock_user.role = UserRole.USER
 
         with pytest.raises(HTTPException) as exc_info:
-            get_current_active_admin(mock_user)
+            get_current_active_admin(_ADMIN_CLAIM, mock_user)
 
         # Verify the authorization error
         assert exc_info.value.status_code == 403
@@ -394,13 +616,13 @@ class TestEdgeCasesAndErrorHandling:
         mock_session = Mock(spec=Session)
 
         # Test InvalidTokenError
-        with patch("app.api.deps.jwt.decode", side_effect=InvalidTokenError("Invalid")):
+        with patch("app.api.deps._jwt.decode", side_effect=InvalidTokenError("Invalid")):
             with pytest.raises(HTTPException) as exc_info:
                 get_current_user(mock_session, "token")
             assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
 
         # Test generic JWT exception
-        with patch("app.api.deps.jwt.decode", side_effect=jwt.DecodeError("Decode error")):
+        with patch("app.api.deps._jwt.decode", side_effect=jwt.DecodeError("Decode error")):
             with pytest.raises(HTTPException) as exc_info:
                 get_current_user(mock_session, "token")
             assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
@@ -413,7 +635,7 @@ class TestEdgeCasesAndErrorHandling:
         mock_payload = {"sub": "123", "admin": False}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -439,15 +661,14 @@ class TestEdgeCasesAndErrorHandling:
 
     def test_user_status_enum_edge_cases(self):
         """Test UserStatus enum value comparisons."""
-        mock_user = Mock(spec=UserDB)
+        mock_user = _make_user()
 
         # Test exact enum match
-        mock_user.status = UserStatus.ACTIVE
         mock_session = Mock()
         mock_payload = {"sub": "123", "admin": False}
 
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -459,10 +680,13 @@ class TestEdgeCasesAndErrorHandling:
             result = get_current_user(mock_session, "token")
             assert result == mock_user
 
-        # Test with integer value instead of enum
+        # Test with integer value instead of enum (bypass the cached first lookup)
+        from app.api.deps import invalidate_cached_user
+
+        invalidate_cached_user(123)
         mock_user.status = 1  # UserStatus.ACTIVE value
         with (
-            patch("app.api.deps.jwt.decode", return_value=mock_payload),
+            patch("app.api.deps._jwt.decode", return_value=mock_payload),
             patch("app.api.deps.settings") as mock_settings,
             patch("app.api.deps.security") as mock_security,
         ):
@@ -473,3 +697,35 @@ class TestEdgeCasesAndErrorHandling:
             # Should succeed with integer value
             result = get_current_user(mock_session, "token")
             assert result == mock_user
+
+
+class TestDependencyChainSharing:
+    """Test the admin dependency reuses the per-request CurrentUser resolution."""
+
+    def test_admin_endpoint_loads_user_once(self):
+        """Test an admin request decodes/loads the user once despite the chained deps."""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from app.api import deps
+
+        app = FastAPI()
+
+        @app.get("/both")
+        def both(user: CurrentUser, admin: CurrentAdminUser):
+            return {"same": user is admin}
+
+        session = Mock(spec=Session)
+        admin_user = _make_user()
+        admin_user.role = UserRole.ADMIN
+        session.get.return_value = admin_user
+        app.dependency_overrides[deps.get_db] = lambda: session
+        payload = {"sub": "123", "admin": True, "exp": time.time() + 60}
+
+        with patch("app.api.deps._jwt.decode", return_value=payload) as decode:
+            r = TestClient(app).get("/both", headers={"Authorization": "Bearer t"})
+
+        assert r.status_code == 200
+        assert r.json() == {"same": True}
+        session.get.assert_called_once()
+        decode.assert_called_once()
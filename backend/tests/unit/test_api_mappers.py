@@ -17,10 +17,19 @@ from app.api.routes._mappers import (
     _ensure_list,
     _status_desc,
     as_aware_utc,
+    to_json_response,
     to_map_task,
     to_map_task_details,
+    to_map_task_details_batch,
+    to_map_task_progress_list,
+)
+from app.models import (
+    BaseResp,
+    ConstraintFactor,
+    MapTaskProgressDB,
+    MapTaskStatus,
+    SuitabilityFactor,
 )
-from app.models import ConstraintFactor, MapTaskStatus, SuitabilityFactor
 
 
 class TestEnsureList:
@@ -55,6 +64,11 @@ class TestEnsureList:
         result = _ensure_list(input_dict)
         assert result == input_dict
 
+    def test_ensure_list_with_json_bytes(self):
+        """Test _ensure_list parses JSON bytes (e.g. raw driver values)."""
+        result = _ensure_list(b'[{"kind": "lake", "value": 100}]')
+        assert result == [{"kind": "lake", "value": 100}]
+
 
 class TestAsAwareUtc:
     """Test as_aware_utc datetime conversion function."""
@@ -78,6 +92,8 @@ class TestAsAwareUtc:
         result = as_aware_utc(utc_dt)
         assert result == utc_dt
         assert result.tzinfo == UTC
+        # Already-UTC values are returned as-is
+        assert result is utc_dt
 
     def test_as_aware_utc_with_different_timezone(self):
         """Test as_aware_utc converts different timezone to UTC."""
@@ -129,6 +145,11 @@ class TestStatusDesc:
         result = _status_desc("invalid")
         assert result is None
 
+    def test_status_desc_accepts_plain_int(self):
+        """Test _status_desc resolves raw integer values as stored in the DB."""
+        assert _status_desc(3) == "Success"
+        assert _status_desc(None) is None
+
 
 class TestDistrictCodeToName:
     """Test district code to name mapping."""
@@ -263,6 +284,26 @@ class TestToMapTask:
             assert result.ended_at == datetime(2023, 1, 15, 11, 0, 0, tzinfo=UTC)
             assert result.created_at == datetime(2023, 1, 15, 9, 0, 0, tzinfo=UTC)
 
+    def test_to_map_task_with_preloaded_email_skips_lookup(self):
+        """Test to_map_task uses a supplied email (including None) without querying."""
+        mock_data = Mock()
+        mock_data.id = 1
+        mock_data.name = "Task"
+        mock_data.user_id = 456
+        mock_data.district = "063"
+        mock_data.status = MapTaskStatus.PENDING
+        mock_data.started_at = None
+        mock_data.ended_at = None
+        mock_data.created_at = datetime(2023, 1, 15, 9, 0, 0)
+
+        with patch("app.api.routes._mappers.crud") as mock_crud:
+            result = to_map_task(Mock(), mock_data, user_email="owner@example.com")
+            missing = to_map_task(Mock(), mock_data, user_email=None)
+
+            assert result.user_email == "owner@example.com"
+            assert missing.user_email is None
+            mock_crud.get_user_by_id.assert_not_called()
+
 
 class TestToMapTaskDetails:
     """Test to_map_task_details mapping function."""
@@ -289,14 +330,13 @@ class TestToMapTaskDetails:
         )
 
         # Mock file data
-        mock_file_db = Mock()
-        mock_file_db.model_dump.return_value = {
-            "id": 1,
-            "map_task_id": 123,
-            "file_path": "test/path/file.shp",
-            "file_type": "shapefile",
-            "created_at": datetime(2023, 1, 15, 9, 30, 0),
-        }
+        mock_file_db = Mock(
+            id=1,
+            map_task_id=123,
+            file_path="test/path/file.shp",
+            file_type="shapefile",
+            created_at=datetime(2023, 1, 15, 9, 30, 0),
+        )
 
         with (
             patch("app.api.routes._mappers.crud") as mock_crud,
@@ -304,7 +344,7 @@ class TestToMapTaskDetails:
         ):
             mock_crud.get_user_by_id.return_value = mock_user
             mock_crud.get_files_by_id.return_value = [mock_file_db]
-            mock_storage.generate_presigned_url.return_value = "https://presigned.url/file.shp"
+            mock_storage.generate_presigned_urls.return_value = ["https://presigned.url/file.shp"]
 
             result = to_map_task_details(mock_session, mock_data)
 
@@ -324,7 +364,7 @@ class TestToMapTaskDetails:
             mock_crud.get_files_by_id.assert_called_once_with(
                 session=mock_session, user_id=456, map_task_id=123
             )
-            mock_storage.generate_presigned_url.assert_called_once_with("test/path/file.shp")
+            mock_storage.generate_presigned_urls.assert_called_once_with(["test/path/file.shp"])
 
     def test_to_map_task_details_no_files(self):
         """Test to_map_task_details handles no files correctly."""
@@ -352,6 +392,7 @@ class TestToMapTaskDetails:
             result = to_map_task_details(mock_session, mock_data)
 
             assert result.files == []
+            mock_storage.generate_presigned_urls.assert_not_called()
             assert result.constraint_factors == []
             assert result.suitability_factors == []
 
@@ -407,22 +448,20 @@ class TestToMapTaskDetails:
         mock_data.suitability_factors = "[]"
 
         # Mock multiple files
-        mock_file1 = Mock()
-        mock_file1.model_dump.return_value = {
-            "id": 1,
-            "map_task_id": 123,
-            "file_path": "test/path/file1.shp",
-            "file_type": "shapefile",
-            "created_at": datetime(2023, 1, 15, 9, 30, 0),
-        }
-        mock_file2 = Mock()
-        mock_file2.model_dump.return_value = {
-            "id": 2,
-            "map_task_id": 123,
-            "file_path": "test/path/file2.tif",
-            "file_type": "raster",
-            "created_at": datetime(2023, 1, 15, 9, 35, 0),
-        }
+        mock_file1 = Mock(
+            id=1,
+            map_task_id=123,
+            file_path="test/path/file1.shp",
+            file_type="shapefile",
+            created_at=datetime(2023, 1, 15, 9, 30, 0),
+        )
+        mock_file2 = Mock(
+            id=2,
+            map_task_id=123,
+            file_path="test/path/file2.tif",
+            file_type="raster",
+            created_at=datetime(2023, 1, 15, 9, 35, 0),
+        )
 
         with (
             patch("app.api.routes._mappers.crud") as mock_crud,
@@ -430,7 +469,7 @@ class TestToMapTaskDetails:
         ):
             mock_crud.get_user_by_id.return_value = None
             mock_crud.get_files_by_id.return_value = [mock_file1, mock_file2]
-            mock_storage.generate_presigned_url.side_effect = [
+            mock_storage.generate_presigned_urls.return_value = [
                 "https://presigned.url/file1.shp",
                 "https://presigned.url/file2.tif",
             ]
@@ -440,7 +479,10 @@ class TestToMapTaskDetails:
             assert len(result.files) == 2
             assert result.files[0].file_path == "https://presigned.url/file1.shp"
             assert result.files[1].file_path == "https://presigned.url/file2.tif"
-            assert mock_storage.generate_presigned_url.call_count == 2
+            # All files are signed in a single batch call
+            mock_storage.generate_presigned_urls.assert_called_once_with(
+                ["test/path/file1.shp", "test/path/file2.tif"]
+            )
 
 
 class TestEdgeCasesAndIntegration:
@@ -530,3 +572,124 @@ class TestEdgeCasesAndIntegration:
             assert result.started_at.microsecond == 123456
             assert result.ended_at is None
             assert result.created_at.microsecond == 654321
+
+
+class TestToMapTaskDetailsBatch:
+    """Test to_map_task_details_batch mapping function."""
+
+    @staticmethod
+    def _row(task_id: int) -> Mock:
+        row = Mock()
+        row.id = task_id
+        row.name = f"task-{task_id}"
+        row.user_id = 7
+        row.district = "063"
+        row.status = MapTaskStatus.SUCCESS
+        row.started_at = None
+        row.ended_at = None
+        row.created_at = datetime(2023, 1, 15, 9, 0, 0)
+        row.constraint_factors = "[]"
+        row.suitability_factors = "[]"
+        return row
+
+    def test_one_file_query_and_one_sign_batch(self):
+        """Test files for all rows are fetched and presigned once, then grouped per task."""
+        rows = [self._row(1), self._row(2), self._row(3)]
+        file_rows = [
+            Mock(id=11, map_task_id=1, file_type="final", file_path="a", created_at=None),
+            Mock(id=12, map_task_id=1, file_type="raster", file_path="b", created_at=None),
+            Mock(id=31, map_task_id=3, file_type="final", file_path="c", created_at=None),
+        ]
+
+        with (
+            patch("app.api.routes._mappers.crud") as mock_crud,
+            patch("app.api.routes._mappers.storage") as mock_storage,
+        ):
+            mock_crud.get_files_by_task_ids.return_value = file_rows
+            mock_storage.generate_presigned_urls.return_value = ["u/a", "u/b", "u/c"]
+
+            result = to_map_task_details_batch(Mock(), rows, user_email="me@example.com")
+
+            mock_crud.get_files_by_task_ids.assert_called_once()
+            assert mock_crud.get_files_by_task_ids.call_args.kwargs["map_task_ids"] == [1, 2, 3]
+            mock_storage.generate_presigned_urls.assert_called_once_with(["a", "b", "c"])
+            mock_crud.get_user_by_id.assert_not_called()
+            mock_crud.get_files_by_id.assert_not_called()
+
+        assert [r.id for r in result] == [1, 2, 3]
+        assert [f.file_path for f in result[0].files] == ["u/a", "u/b"]
+        assert result[1].files == []
+        assert [f.file_path for f in result[2].files] == ["u/c"]
+        assert {r.user_email for r in result} == {"me@example.com"}
+
+    def test_owner_emails_loaded_in_one_query(self):
+        """Test rows without a known owner get their emails from one batched lookup."""
+        rows = [self._row(1), self._row(2)]
+        rows[1].user_id = 8
+
+        with (
+            patch("app.api.routes._mappers.crud") as mock_crud,
+            patch("app.api.routes._mappers.storage"),
+        ):
+            mock_crud.get_files_by_task_ids.return_value = []
+            mock_crud.get_user_emails_by_ids.return_value = {rows[0].user_id: "a@example.com"}
+
+            result = to_map_task_details_batch(Mock(), rows)
+
+            mock_crud.get_user_emails_by_ids.assert_called_once()
+            mock_crud.get_user_by_id.assert_not_called()
+
+        assert [r.user_email for r in result] == ["a@example.com", None]
+
+    def test_empty_rows(self):
+        """Test an empty list maps to an empty list without signing anything."""
+        with (
+            patch("app.api.routes._mappers.crud") as mock_crud,
+            patch("app.api.routes._mappers.storage") as mock_storage,
+        ):
+            mock_crud.get_files_by_task_ids.return_value = []
+            assert to_map_task_details_batch(Mock(), []) == []
+            mock_storage.generate_presigned_urls.assert_not_called()
+
+
+class TestToMapTaskProgressList:
+    """Test to_map_task_progress_list mapping function."""
+
+    def test_maps_rows_and_makes_timestamps_aware(self):
+        """Test rows are copied to API items with UTC-aware created_at."""
+        naive = datetime(2023, 1, 15, 9, 30, 0)
+        row = MapTaskProgressDB(
+            id=1,
+            map_task_id=2,
+            percent=40,
+            description="clipping",
+            phase="clip",
+            error_msg=None,
+            created_at=naive,
+            updated_at=naive,
+        )
+
+        result = to_map_task_progress_list([row])
+
+        assert len(result) == 1
+        item = result[0]
+        assert (item.id, item.map_task_id, item.percent) == (1, 2, 40)
+        assert item.description == "clipping"
+        assert item.phase == "clip"
+        assert item.created_at == naive.replace(tzinfo=UTC)
+        # The ORM row itself is not mutated
+        assert row.created_at.tzinfo is None
+
+    def test_empty_rows(self):
+        """Test an empty row list maps to an empty list."""
+        assert to_map_task_progress_list([]) == []
+
+
+class TestToJsonResponse:
+    """Test to_json_response helper."""
+
+    def test_serializes_model_to_json_body(self):
+        """Test the model is rendered as a JSON response body."""
+        resp = to_json_response(BaseResp(error=0))
+        assert resp.media_type == "application/json"
+        assert json.loads(resp.body) == {"error": 0}
@@ -21,6 +21,7 @@ def make_app_with_overrides(current_user_is_admin: bool = False):
             self.id = uid
             self.role = UserRole.ADMIN if admin else UserRole.USER
             self.status = UserStatus.ACTIVE
+            self.email = "user@example.com"
 
     def override_get_db():
         # Match Depends(get_db) which yields a Session
@@ -67,6 +68,26 @@ def test_user_select_options_endpoints():
     body = r.json()
     assert body["error"] == 0
 
+    # keyword matching is case-insensitive and repeated queries are served from the cache
+    from app.api.routes import user as user_routes
+
+    user_routes._district_options_json.cache_clear()
+    for _ in range(2):
+        r = client.get("/user/select-options/district?keyword=%20AUCK%20")
+        assert r.json()["list"] == [{"code": "076", "label": "Auckland"}]
+    assert user_routes._district_options_json.cache_info().hits == 1
+
+    # limit caps the result; an empty keyword matches everything
+    r = client.get("/user/select-options/district?limit=3&keyword=%20")
+    assert len(r.json()["list"]) == 3
+    r = client.get("/user/select-options/constraint-factors?limit=0")
+    assert [it["code"] for it in r.json()["list"]] == [
+        "rivers",
+        "lakes",
+        "coastlines",
+        "residential",
+    ]
+
     # my map tasks listing (mock crud)
     with patch("app.api.routes.user.crud.list_map_tasks", return_value=[]):
         r = client.get("/user/my-map-tasks")
@@ -97,8 +118,8 @@ def test_admin_users_list_endpoint():
         email="a@b.com",
         role=0,
         status=1,
-        created_at="2024-01-01T00:00:00Z",
-        last_login="2024-01-02T00:00:00Z",
+        created_at=datetime(2024, 1, 1),
+        last_login=datetime(2024, 1, 2),
     )
     with patch("app.api.routes.admin.crud.admin_list_users", return_value=([fake_row], 1, 20, 1)):
         r = client.get("/admin/users?page_size=20&current_page=1")
@@ -107,6 +128,7 @@ def test_admin_users_list_endpoint():
         assert body["error"] == 0
         assert body["total"] == 1
         assert isinstance(body["list"], list)
+        assert body["list"][0]["created_at"] == "2024-01-01T00:00:00"
 
 
 def test_user_get_map_task_not_found():
@@ -132,17 +154,19 @@ def test_admin_map_tasks_list_endpoint():
     )
     with (
         patch(
-            "app.api.routes.admin.crud.admin_list_map_tasks", return_value=([fake_row], 1, 20, 1)
-        ),
-        patch(
-            "app.api.routes._mappers.crud.get_user_by_id", return_value=MagicMock(email="a@b.com")
+            "app.api.routes.admin.crud.admin_list_map_tasks",
+            return_value=([(fake_row, "a@b.com")], 1, 20, 1),
         ),
+        patch("app.api.routes._mappers.crud.get_user_by_id") as get_user_mock,
     ):
         r = client.get("/admin/map-tasks?page_size=20&current_page=1")
         assert r.status_code == 200
         body = r.json()
         assert body["error"] == 0
         assert body["total"] == 1
+        assert body["list"][0]["user_email"] == "a@b.com"
+        # Email comes from the joined listing query, not a per-row lookup
+        get_user_mock.assert_not_called()
 
     def test_admin_map_task_progress_lists_rows():
         app = make_app_with_overrides(current_user_is_admin=True)
@@ -186,6 +210,39 @@ def test_user_district_histograms_success():
     assert isinstance(body["list"], list)
 
 
+def test_user_district_histograms_kind_filter_and_not_found():
+    app = make_app_with_overrides()
+    client = TestClient(app)
+    r = client.get("/user/districts/063/histograms?kind=slope")
+    assert r.status_code == 200
+    body = r.json()
+    assert [item["kind"] for item in body["list"]] == ["slope"]
+    assert body["list"][0]["histogram"]["max"] == 67.0
+
+    assert client.get("/user/districts/063/histograms?kind=nope").status_code == 404
+    assert client.get("/user/districts/zzz/histograms").status_code == 404
+
+
+def test_static_endpoints_revalidate_with_etag():
+    app = make_app_with_overrides()
+    client = TestClient(app)
+    for url in ("/user/districts/063/histograms", "/user/select-options/district?limit=3"):
+        r = client.get(url)
+        assert r.status_code == 200
+        etag = r.headers["etag"]
+        assert r.headers["cache-control"] == "private, max-age=3600"
+
+        r = client.get(url, headers={"If-None-Match": f'"stale", {etag}'})
+        assert r.status_code == 304
+        assert r.content == b""
+        assert r.headers["etag"] == etag
+
+        assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    other = client.get("/user/select-options/district?limit=4").headers["etag"]
+    assert other != client.get("/user/select-options/district?limit=3").headers["etag"]
+
+
 def test_user_map_task_progress_lists_rows():
     app = make_app_with_overrides()
     client = TestClient(app)
@@ -220,14 +277,22 @@ def test_user_map_task_progress_lists_rows():
 def test_admin_user_status_update_404_and_success():
     app = make_app_with_overrides(current_user_is_admin=True)
     client = TestClient(app)
-    # 404 when update returns False
-    with patch("app.api.routes.admin.crud.admin_update_user_status", return_value=False):
+    # 404 when update returns False; nothing changed so the user cache is left alone
+    with (
+        patch("app.api.routes.admin.crud.admin_update_user_status", return_value=False),
+        patch("app.api.routes.admin.invalidate_cached_user") as invalidate_mock,
+    ):
         r = client.post("/admin/user-status", json={"user_id": 1, "status": 1})
         assert r.status_code == 404
-    # success
-    with patch("app.api.routes.admin.crud.admin_update_user_status", return_value=True):
-        r = client.post("/admin/user-status", json={"user_id": 1, "status": 1})
+        invalidate_mock.assert_not_called()
+    # success drops the cached user so the new status applies on the next request
+    with (
+        patch("app.api.routes.admin.crud.admin_update_user_status", return_value=True),
+        patch("app.api.routes.admin.invalidate_cached_user") as invalidate_mock,
+    ):
+        r = client.post("/admin/user-status", json={"user_id": 7, "status": 2})
         assert r.status_code == 200
+        invalidate_mock.assert_called_once_with(7)
 
 
 def test_admin_get_map_task_404():
@@ -280,11 +345,14 @@ def test_user_tile_signature_success():
     with patch(
         "app.api.routes.user.crud.get_map_task", return_value=SimpleNamespace(id=12, user_id=1)
     ):
-        r = client.get("/user/my-map-tasks/12/tile-signature")
+        with patch("app.api.routes.user.time.time", return_value=1_700_000_000.5):
+            r = client.get("/user/my-map-tasks/12/tile-signature")
         assert r.status_code == 200
         body = r.json()
         assert body["error"] == 0
         assert "data" in body and "sig" in body["data"]
+        # Expires one hour from now, in whole epoch seconds
+        assert body["data"]["exp"] == 1_700_003_600
 
 
 def test_user_duplicate_map_task_admin_only():
@@ -309,3 +377,56 @@ def test_auth_logout_and_refresh():
     r = client.post("/user/logout")
     assert r.status_code == 200
     assert r.json()["error"] == 0
+
+
+def test_list_endpoints_keep_documented_response_schemas():
+    # List endpoints return pre-serialized JSON, but OpenAPI must still describe them
+    app = make_app_with_overrides(current_user_is_admin=True)
+    paths = app.openapi()["paths"]
+    for path, schema in (
+        ("/admin/users", "User4AdminPageData"),
+        ("/admin/map-tasks", "MapTask4AdminPageData"),
+        ("/user/my-map-tasks", "MyMapTaskListResp"),
+    ):
+        content = paths[path]["get"]["responses"]["200"]["content"]["application/json"]
+        assert content["schema"]["$ref"].endswith(f"/{schema}")
+
+
+def test_api_routes_render_with_orjson():
+    from fastapi.responses import ORJSONResponse
+
+    app = make_app_with_overrides()
+    row = SimpleNamespace(
+        id=1,
+        map_task_id=2,
+        percent=10,
+        description=None,
+        phase=None,
+        error_msg=None,
+        created_at=datetime(2024, 1, 2, 3, 4, 5),
+    )
+    render = ORJSONResponse.render
+    with (
+        patch("app.api.routes.user.crud.get_map_task_progress", return_value=[row]),
+        patch.object(ORJSONResponse, "render", autospec=True, side_effect=render) as spy,
+    ):
+        r = TestClient(app).get("/user/my-map-tasks/2/progress")
+    spy.assert_called_once()
+    # Datetimes still come out as ISO-8601 strings
+    assert r.json()["list"][0]["created_at"] == "2024-01-02T03:04:05Z"
+
+
+def test_api_routes_are_registered_once():
+    from fastapi.routing import APIRoute
+
+    from app.api.routes import admin, auth, user
+
+    routes = [
+        (route.path, method)
+        for router in (auth.router, user.router, admin.router)
+        for route in router.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    ]
+    assert routes
+    assert len(set(routes)) == len(routes)
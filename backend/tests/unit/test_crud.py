@@ -4,13 +4,15 @@ Unit tests for app.crud module.
 Tests CRUD operations for users, map tasks, and file management.
 """
 
+import json
 import sys
 from datetime import UTC, datetime
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 from fastapi import BackgroundTasks, HTTPException
-from sqlmodel import Session
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
 
 # Mock the circular import modules before importing
 mock_modules = {
@@ -20,14 +22,20 @@ sys.modules.update(mock_modules)
 
 # Now import after setting up mocks
 from app.crud import (
+    admin_list_map_tasks,
+    admin_update_user_status,
     authenticate,
     create_map_task,
     create_user,
+    delete_map_task,
     get_file_by_conditions,
     get_files_by_id,
+    get_files_by_task_ids,
     get_map_task,
     get_user_by_email,
     get_user_by_id,
+    get_user_emails_by_ids,
+    list_map_tasks,
     touch_last_login,
 )
 from app.models import (
@@ -35,6 +43,7 @@ from app.models import (
     CreateMapTaskReq,
     MapTaskDB,
     MapTaskFileDB,
+    MapTaskProgressDB,
     MapTaskStatus,
     SuitabilityFactor,
     UserCreate,
@@ -44,6 +53,51 @@ from app.models import (
 )
 
 
+@pytest.fixture
+def sqlite_session():
+    """In-memory SQLite session with the ORM tables created."""
+    engine = create_engine("sqlite://", echo=False)
+    SQLModel.metadata.create_all(
+        engine,
+        tables=[
+            UserDB.__table__,
+            MapTaskDB.__table__,
+            MapTaskFileDB.__table__,
+            MapTaskProgressDB.__table__,
+        ],
+    )
+    with Session(engine) as session:
+        yield session
+
+
+def _add_user(session: Session, user_id: int, email: str) -> UserDB:
+    user = UserDB(
+        id=user_id,
+        email=email,
+        password_hash="hashed",
+        provider="local",
+        sub=email,
+        role=UserRole.USER,
+        status=UserStatus.ACTIVE,
+    )
+    session.add(user)
+    return user
+
+
+def _add_task(session: Session, task_id: int, user_id: int, **fields) -> MapTaskDB:
+    task = MapTaskDB(
+        id=task_id,
+        user_id=user_id,
+        name=fields.pop("name", f"task-{task_id}"),
+        district="063",
+        status=fields.pop("status", MapTaskStatus.SUCCESS),
+        created_at=fields.pop("created_at", datetime(2024, 1, 1, 0, 0, task_id)),
+        **fields,
+    )
+    session.add(task)
+    return task
+
+
 class TestTouchLastLogin:
     """Test touch_last_login function."""
 
@@ -201,24 +255,21 @@ class TestGetUserById:
             status=UserStatus.ACTIVE,
         )
 
-        mock_exec = Mock()
-        mock_exec.first.return_value = expected_user
-        mock_session.exec.return_value = mock_exec
+        mock_session.get.return_value = expected_user
 
         # Act
         result = get_user_by_id(session=mock_session, user_id=1)
 
         # Assert
         assert result == expected_user
+        mock_session.get.assert_called_once_with(UserDB, 1)
 
     def test_get_user_by_id_not_found(self):
         """Test getting user by ID when user doesn't exist."""
         # Arrange
         mock_session = Mock(spec=Session)
 
-        mock_exec = Mock()
-        mock_exec.first.return_value = None
-        mock_session.exec.return_value = mock_exec
+        mock_session.get.return_value = None
 
         # Act
         result = get_user_by_id(session=mock_session, user_id=999)
@@ -342,8 +393,9 @@ class TestAuthenticate:
         mock_touch.assert_called_once_with(session=mock_session, user=user)
 
     @patch("app.crud.get_user_by_email")
-    def test_authenticate_user_not_found(self, mock_get_user):
-        """Test authentication when user doesn't exist."""
+    @patch("app.crud.dummy_verify_password")
+    def test_authenticate_user_not_found(self, mock_dummy_verify, mock_get_user):
+        """Test authentication when user doesn't exist still spends a password check."""
         # Arrange
         mock_session = Mock(spec=Session)
         mock_get_user.return_value = None
@@ -355,6 +407,7 @@ class TestAuthenticate:
 
         # Assert
         assert result is None
+        mock_dummy_verify.assert_called_once_with("password123")
 
     @patch("app.crud.get_user_by_email")
     @patch("app.crud.verify_password")
@@ -443,6 +496,9 @@ class TestCreateMapTask:
         mock_session.commit.assert_called_once()
         mock_session.refresh.assert_called_once()
         mock_background_tasks.add_task.assert_called_once()
+        stored = mock_session.add.call_args.args[0]
+        assert json.loads(stored.constraint_factors) == [{"kind": "lakes", "value": 100.0}]
+        assert json.loads(stored.suitability_factors)[0]["breakpoints"] == [0, 10]
 
     @patch("app.crud.settings")
     def test_create_map_task_read_only_mode(self, mock_settings):
@@ -502,24 +558,30 @@ class TestGetMapTask:
         mock_session = Mock(spec=Session)
         expected_task = MapTaskDB(id=1, user_id=1, district=1, status=MapTaskStatus.PENDING)
 
-        mock_exec = Mock()
-        mock_exec.first.return_value = expected_task
-        mock_session.exec.return_value = mock_exec
+        mock_session.get.return_value = expected_task
 
         # Act
         result = get_map_task(session=mock_session, user_id=1, task_id=1)
 
         # Assert
         assert result == expected_task
+        mock_session.get.assert_called_once_with(MapTaskDB, 1)
+
+    def test_get_map_task_owned_by_another_user(self):
+        """Test a task belonging to someone else is reported as not found."""
+        mock_session = Mock(spec=Session)
+        mock_session.get.return_value = MapTaskDB(
+            id=1, user_id=2, district=1, status=MapTaskStatus.PENDING
+        )
+
+        assert get_map_task(session=mock_session, user_id=1, task_id=1) is None
 
     def test_get_map_task_not_found(self):
         """Test getting map task when it doesn't exist."""
         # Arrange
         mock_session = Mock(spec=Session)
 
-        mock_exec = Mock()
-        mock_exec.first.return_value = None
-        mock_session.exec.return_value = mock_exec
+        mock_session.get.return_value = None
 
         # Act
         result = get_map_task(session=mock_session, user_id=1, task_id=999)
@@ -528,6 +590,67 @@ class TestGetMapTask:
         assert result is None
 
 
+class TestAdminListMapTasks:
+    """Test admin_list_map_tasks against a real (SQLite) database."""
+
+    def test_rows_include_owner_email_from_join(self, sqlite_session):
+        """Test that each row carries its owner's email, or None for orphaned tasks."""
+        _add_user(sqlite_session, 1, "one@example.com")
+        _add_task(sqlite_session, 1, user_id=1)
+        _add_task(sqlite_session, 2, user_id=99)
+        sqlite_session.commit()
+
+        rows, total, ps, cp = admin_list_map_tasks(
+            session=sqlite_session, page_size=10, current_page=1
+        )
+
+        assert (total, ps, cp) == (2, 10, 1)
+        # Newest first
+        assert [(task.id, email) for task, email in rows] == [
+            (2, None),
+            (1, "one@example.com"),
+        ]
+
+    def test_name_filter_treats_wildcards_literally(self, sqlite_session):
+        """Test '_' and '%' in the search term match themselves, not any character."""
+        _add_task(sqlite_session, 1, user_id=1, name="site_a")
+        _add_task(sqlite_session, 2, user_id=1, name="siteXa")
+        _add_task(sqlite_session, 3, user_id=1, name="100% coverage")
+        sqlite_session.commit()
+
+        def names(term):
+            rows, _, _, _ = admin_list_map_tasks(
+                session=sqlite_session, page_size=10, current_page=1, name=term
+            )
+            return [task.name for task, _ in rows]
+
+        assert names("site_a") == ["site_a"]
+        assert names(" 0% ") == ["100% coverage"]
+
+    def test_filters_apply_with_join(self, sqlite_session):
+        """Test that name/user/status filters still narrow the joined query."""
+        _add_user(sqlite_session, 1, "one@example.com")
+        _add_user(sqlite_session, 2, "two@example.com")
+        _add_task(sqlite_session, 1, user_id=1, name="alpha")
+        _add_task(sqlite_session, 2, user_id=2, name="alpha beta")
+        _add_task(sqlite_session, 3, user_id=2, name="gamma", status=MapTaskStatus.PENDING)
+        sqlite_session.commit()
+
+        rows, total, _, _ = admin_list_map_tasks(
+            session=sqlite_session, page_size=10, current_page=1, name="alpha", user_id=2
+        )
+        assert total == 1
+        assert [(task.id, email) for task, email in rows] == [(2, "two@example.com")]
+
+        rows, total, _, _ = admin_list_map_tasks(
+            session=sqlite_session,
+            page_size=10,
+            current_page=1,
+            status=MapTaskStatus.PENDING,
+        )
+        assert total == 1 and rows[0][0].id == 3
+
+
 class TestEdgeCasesAndIntegration:
     """Test edge cases and integration scenarios."""
 
@@ -556,3 +679,274 @@ class TestEdgeCasesAndIntegration:
         """Test complex authentication scenario with all components."""
         # This would be covered by the individual function tests above
         pass
+
+
+class TestGetFilesByTaskIds:
+    """Test get_files_by_task_ids against a real (SQLite) database."""
+
+    def test_loads_files_of_all_requested_tasks(self, sqlite_session):
+        """Test one call returns the files of every listed task and nothing else."""
+        for file_id, task_id in [(1, 10), (2, 10), (3, 11), (4, 12)]:
+            sqlite_session.add(
+                MapTaskFileDB(
+                    id=file_id,
+                    user_id=1,
+                    map_task_id=task_id,
+                    file_type="final",
+                    file_path=f"k/{file_id}",
+                )
+            )
+        sqlite_session.commit()
+
+        files = get_files_by_task_ids(session=sqlite_session, map_task_ids=[10, 11])
+
+        assert sorted(f.id for f in files) == [1, 2, 3]
+
+    def test_empty_ids_skip_query(self):
+        """Test that no query is issued for an empty id list."""
+        session = Mock(spec=Session)
+        assert get_files_by_task_ids(session=session, map_task_ids=[]) == []
+        session.exec.assert_not_called()
+
+
+class TestDeleteMapTask:
+    """Test delete_map_task against a real (SQLite) database."""
+
+    def test_storage_cleanup_deferred_to_background_tasks(self, sqlite_session):
+        """Test rows are removed before returning and object keys are deleted afterwards."""
+        _add_task(sqlite_session, 5, user_id=1)
+        sqlite_session.add(
+            MapTaskFileDB(id=1, user_id=1, map_task_id=5, file_type="final", file_path="k/1")
+        )
+        sqlite_session.commit()
+        background_tasks = BackgroundTasks()
+
+        with (
+            patch("app.crud.settings.RELEASE_READ_ONLY", False),
+            patch("app.crud.storage.delete_files") as mock_delete_files,
+        ):
+            deleted = delete_map_task(
+                session=sqlite_session, user_id=1, task_id=5, background_tasks=background_tasks
+            )
+
+            assert deleted is not None
+            assert sqlite_session.get(MapTaskDB, 5) is None
+            assert get_files_by_task_ids(session=sqlite_session, map_task_ids=[5]) == []
+            mock_delete_files.assert_not_called()
+
+            task = background_tasks.tasks[0]
+            task.func(*task.args, **task.kwargs)
+            mock_delete_files.assert_called_once_with(["k/1"])
+
+    def test_task_without_files_skips_file_delete(self, sqlite_session):
+        """Test a task with no outputs costs no file DELETE and no storage call."""
+        _add_task(sqlite_session, 6, user_id=1, status=MapTaskStatus.FAILURE)
+        sqlite_session.commit()
+
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = sqlite_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            with (
+                patch("app.crud.settings.RELEASE_READ_ONLY", False),
+                patch("app.crud.storage.delete_files") as mock_delete_files,
+            ):
+                assert delete_map_task(session=sqlite_session, user_id=1, task_id=6)
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        mock_delete_files.assert_not_called()
+        deletes = [st for st in statements if st.lstrip().upper().startswith("DELETE")]
+        assert deletes and not any("t_map_task_files" in st for st in deletes)
+        assert sqlite_session.get(MapTaskDB, 6) is None
+
+    def test_file_rows_deleted_when_file_read_fails(self, sqlite_session):
+        """Test a failed file-key read still deletes the task's file rows."""
+        _add_task(sqlite_session, 7, user_id=1, status=MapTaskStatus.SUCCESS)
+        sqlite_session.add(
+            MapTaskFileDB(id=2, user_id=1, map_task_id=7, file_type="final", file_path="k/2")
+        )
+        sqlite_session.commit()
+        real_exec = sqlite_session.exec
+
+        def _exec(statement, *args, **kwargs):
+            if "SELECT t_map_task_files.file_path" in str(statement):
+                raise RuntimeError("read failed")
+            return real_exec(statement, *args, **kwargs)
+
+        with (
+            patch("app.crud.settings.RELEASE_READ_ONLY", False),
+            patch("app.crud.storage.delete_files") as mock_delete_files,
+            patch.object(sqlite_session, "exec", side_effect=_exec),
+        ):
+            assert delete_map_task(session=sqlite_session, user_id=1, task_id=7)
+
+        mock_delete_files.assert_not_called()
+        assert sqlite_session.get(MapTaskDB, 7) is None
+        assert get_files_by_task_ids(session=sqlite_session, map_task_ids=[7]) == []
+
+
+class TestAdminUpdateUserStatus:
+    """Test admin_update_user_status against a real (SQLite) database."""
+
+    def _statements(self, sqlite_session, **kwargs) -> tuple[bool, list[str]]:
+        statements: list[str] = []
+
+        def _record(conn, cursor, statement, *args):
+            statements.append(statement.lstrip().split()[0].upper())
+
+        engine = sqlite_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            updated = admin_update_user_status(session=sqlite_session, **kwargs)
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+        return updated, statements
+
+    def test_updates_regular_user_status(self, sqlite_session):
+        """Test a status change is one UPDATE, with no reload of the row."""
+        user = _add_user(sqlite_session, 1, "one@example.com")
+        sqlite_session.commit()
+        sqlite_session.refresh(user)
+
+        updated, statements = self._statements(
+            sqlite_session, target_user_id=1, status=UserStatus.LOCKED
+        )
+
+        assert updated is True
+        assert statements == ["UPDATE"]
+        assert sqlite_session.get(UserDB, 1).status == UserStatus.LOCKED
+
+    def test_unchanged_status_still_reports_success(self, sqlite_session):
+        """Test setting the current status again is a no-op that reports success."""
+        _add_user(sqlite_session, 1, "one@example.com")
+        sqlite_session.commit()
+        sqlite_session.expunge_all()
+
+        updated, statements = self._statements(
+            sqlite_session, target_user_id=1, status=UserStatus.ACTIVE
+        )
+
+        assert updated is True
+        assert statements == ["UPDATE", "SELECT"]
+
+    def test_admin_and_unknown_users_are_not_updated(self, sqlite_session):
+        """Test admins keep their status and unknown ids report False."""
+        admin = _add_user(sqlite_session, 1, "admin@example.com")
+        admin.role = UserRole.ADMIN
+        sqlite_session.commit()
+
+        assert (
+            admin_update_user_status(
+                session=sqlite_session, target_user_id=1, status=UserStatus.LOCKED
+            )
+            is False
+        )
+        assert sqlite_session.get(UserDB, 1).status == UserStatus.ACTIVE
+        assert (
+            admin_update_user_status(
+                session=sqlite_session, target_user_id=99, status=UserStatus.LOCKED
+            )
+            is False
+        )
+
+
+class TestGetUserEmailsByIds:
+    """Test get_user_emails_by_ids against a real (SQLite) database."""
+
+    def test_maps_ids_to_emails(self, sqlite_session):
+        """Test duplicate and unknown ids collapse into one id -> email mapping."""
+        _add_user(sqlite_session, 1, "one@example.com")
+        _add_user(sqlite_session, 2, "two@example.com")
+
+        emails = get_user_emails_by_ids(session=sqlite_session, user_ids=[1, 1, 2, 99])
+
+        assert emails == {1: "one@example.com", 2: "two@example.com"}
+
+    def test_empty_ids_skip_query(self):
+        """Test that no query is issued for an empty id list."""
+        session = Mock(spec=Session)
+        assert get_user_emails_by_ids(session=session, user_ids=[]) == {}
+        session.exec.assert_not_called()
+
+
+class TestListMapTasks:
+    """Test list_map_tasks against a real (SQLite) database."""
+
+    def test_completed_filter_splits_statuses(self, sqlite_session):
+        """Test completed=True/False select finished/active tasks, newest first."""
+        statuses = [
+            MapTaskStatus.PENDING,
+            MapTaskStatus.PROCESSING,
+            MapTaskStatus.SUCCESS,
+            MapTaskStatus.FAILURE,
+            MapTaskStatus.CANCELLED,
+        ]
+        for task_id, status in enumerate(statuses, start=1):
+            _add_task(sqlite_session, task_id, user_id=1, status=status)
+        _add_task(sqlite_session, 9, user_id=2)
+        sqlite_session.commit()
+
+        def ids(**kwargs):
+            return [t.id for t in list_map_tasks(session=sqlite_session, user_id=1, **kwargs)]
+
+        assert ids() == [5, 4, 3, 2, 1]
+        assert ids(completed=True) == [5, 4, 3]
+        assert ids(completed=False) == [2, 1]
+
+
+class TestMapTaskListQueryCount:
+    """Pin the number of SQL statements behind the user's task list (N+1 guard)."""
+
+    def test_task_list_with_details_uses_fixed_query_count(self, sqlite_session):
+        """Test listing and mapping N tasks costs the same two queries for any N."""
+        from app.api.routes._mappers import to_map_task_details_batch
+
+        _add_user(sqlite_session, 1, "one@example.com")
+        for task_id in range(1, 6):
+            _add_task(
+                sqlite_session,
+                task_id,
+                user_id=1,
+                constraint_factors="[]",
+                suitability_factors="[]",
+            )
+            sqlite_session.add(
+                MapTaskFileDB(
+                    id=task_id,
+                    user_id=1,
+                    map_task_id=task_id,
+                    file_type="final",
+                    file_path=f"k/{task_id}",
+                )
+            )
+        sqlite_session.commit()
+        sqlite_session.expunge_all()
+
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = sqlite_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            with patch(
+                "app.api.routes._mappers.storage.generate_presigned_urls",
+                side_effect=lambda keys: [f"signed/{k}" for k in keys],
+            ):
+                rows = list_map_tasks(session=sqlite_session, user_id=1)
+                details = to_map_task_details_batch(
+                    sqlite_session, rows, user_email="one@example.com"
+                )
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert len(details) == 5
+        assert all(len(d.files) == 1 for d in details)
+        # One SELECT for the tasks, one for all of their files
+        assert len(statements) == 2
@@ -0,0 +1,44 @@
+from datetime import UTC, datetime, timedelta, timezone
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.db.types import UTCDateTime
+from app.models import MapTaskProgressDB
+
+
+class TestUTCDateTime:
+    def test_bind_converts_aware_to_naive_utc(self):
+        t = UTCDateTime()
+        nzst = timezone(timedelta(hours=12))
+        bound = t.process_bind_param(datetime(2024, 1, 1, 12, 0, tzinfo=nzst), None)
+        assert bound == datetime(2024, 1, 1, 0, 0)
+        assert bound.tzinfo is None
+        # Naive values are assumed to already be UTC and pass through
+        assert t.process_bind_param(datetime(2024, 1, 1), None) == datetime(2024, 1, 1)
+        assert t.process_bind_param(None, None) is None
+
+    def test_result_is_tagged_utc(self):
+        t = UTCDateTime()
+        assert t.process_result_value(datetime(2024, 1, 1), None).tzinfo is UTC
+        assert t.process_result_value(None, None) is None
+
+    def test_progress_rows_round_trip_as_aware_utc(self):
+        engine = create_engine("sqlite://", echo=False)
+        SQLModel.metadata.create_all(engine, tables=[MapTaskProgressDB.__table__])
+        with Session(engine) as s:
+            s.add(
+                MapTaskProgressDB(
+                    id=1,
+                    user_id=1,
+                    map_task_id=2,
+                    percent=50,
+                    created_at=datetime(2024, 1, 1, 9, 30, tzinfo=UTC),
+                    updated_at=datetime(2024, 1, 1, 9, 30),
+                )
+            )
+            s.commit()
+            s.expunge_all()
+
+            row = s.exec(select(MapTaskProgressDB)).one()
+            assert row.created_at == datetime(2024, 1, 1, 9, 30, tzinfo=UTC)
+            assert row.updated_at.tzinfo is UTC
@@ -66,9 +66,8 @@ class TestMapTaskMonitor:
         assert MapTaskMonitor._clamp_percent("invalid") == 0
         assert MapTaskMonitor._clamp_percent(None) == 0
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
-    def test_is_cancelled_task_exists_cancelled(self, mock_engine, mock_session_class):
+    @patch.object(processor_module, "SessionLocal")
+    def test_is_cancelled_task_exists_cancelled(self, mock_session_class):
         """Test is_cancelled when task exists and is cancelled."""
         # Arrange
         mock_session = Mock()
@@ -86,9 +85,8 @@ class TestMapTaskMonitor:
         # Assert
         assert result is True
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
-    def test_is_cancelled_task_exists_not_cancelled(self, mock_engine, mock_session_class):
+    @patch.object(processor_module, "SessionLocal")
+    def test_is_cancelled_task_exists_not_cancelled(self, mock_session_class):
         """Test is_cancelled when task exists and is not cancelled."""
         # Arrange
         mock_session = Mock()
@@ -106,9 +104,8 @@ class TestMapTaskMonitor:
         # Assert
         assert result is False
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
-    def test_is_cancelled_task_not_found(self, mock_engine, mock_session_class):
+    @patch.object(processor_module, "SessionLocal")
+    def test_is_cancelled_task_not_found(self, mock_session_class):
         """Test is_cancelled when task is not found."""
         # Arrange
         mock_session = Mock()
@@ -123,10 +120,9 @@ class TestMapTaskMonitor:
         # Assert
         assert result is True  # Missing task treated as cancelled for safety
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_update_progress_success(self, mock_logger, mock_engine, mock_session_class):
+    def test_update_progress_success(self, mock_logger, mock_session_class):
         """Test successful progress update."""
         # Arrange
         mock_session = Mock()
@@ -149,10 +145,9 @@ class TestMapTaskMonitor:
         assert call_args.phase == "processing"
         assert call_args.description == "Working on data"
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_update_progress_with_none_values(self, mock_logger, mock_engine, mock_session_class):
+    def test_update_progress_with_none_values(self, mock_logger, mock_session_class):
         """Test progress update with None phase and description."""
         # Arrange
         mock_session = Mock()
@@ -168,10 +163,9 @@ class TestMapTaskMonitor:
         assert call_args.phase is None
         assert call_args.description is None
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_update_progress_database_error(self, mock_logger, mock_engine, mock_session_class):
+    def test_update_progress_database_error(self, mock_logger, mock_session_class):
         """Test progress update with database error."""
         # Arrange
         mock_session = Mock()
@@ -187,10 +181,9 @@ class TestMapTaskMonitor:
         mock_logger.error.assert_called_once()
         assert "progress insert failed" in mock_logger.error.call_args[0][0]
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_record_error_success(self, mock_logger, mock_engine, mock_session_class):
+    def test_record_error_success(self, mock_logger, mock_session_class):
         """Test successful error recording."""
         # Arrange
         mock_session = Mock()
@@ -214,10 +207,9 @@ class TestMapTaskMonitor:
         assert call_args.description == "Error occurred"
         assert call_args.error_msg == "Test error"
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_record_error_with_none_percent(self, mock_logger, mock_engine, mock_session_class):
+    def test_record_error_with_none_percent(self, mock_logger, mock_session_class):
         """Test error recording with None percent."""
         # Arrange
         mock_session = Mock()
@@ -232,10 +224,9 @@ class TestMapTaskMonitor:
         call_args = mock_session.add.call_args[0][0]
         assert call_args.percent == 0
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_record_error_database_failure(self, mock_logger, mock_engine, mock_session_class):
+    def test_record_error_database_failure(self, mock_logger, mock_session_class):
         """Test error recording with database failure."""
         # Arrange
         mock_session = Mock()
@@ -252,12 +243,9 @@ class TestMapTaskMonitor:
         assert "record_error failed" in mock_logger.error.call_args[0][0]
 
     @patch.object(processor_module.storage, "save_task_file")
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_record_file_success(
-        self, mock_logger, mock_engine, mock_session_class, mock_save_task_file
-    ):
+    def test_record_file_success(self, mock_logger, mock_session_class, mock_save_task_file):
         """Test successful file recording."""
         # Arrange
         mock_session = Mock()
@@ -282,12 +270,9 @@ class TestMapTaskMonitor:
         assert call_args.file_path == "new/file/path.tif"
 
     @patch.object(processor_module.storage, "save_task_file")
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
+    @patch.object(processor_module, "SessionLocal")
     @patch.object(processor_module, "logger")
-    def test_record_file_database_error(
-        self, mock_logger, mock_engine, mock_session_class, mock_save_task_file
-    ):
+    def test_record_file_database_error(self, mock_logger, mock_session_class, mock_save_task_file):
         """Test file recording with database error."""
         # Arrange
         mock_session = Mock()
@@ -307,9 +292,8 @@ class TestMapTaskMonitor:
 class TestHelperFunctions:
     """Test helper functions in processor module."""
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
-    def test_quick_update_task_success(self, mock_engine, mock_session_class):
+    @patch.object(processor_module, "SessionLocal")
+    def test_quick_update_task_success(self, mock_session_class):
         """Test successful task update."""
         # Arrange
         mock_session = Mock()
@@ -327,9 +311,8 @@ class TestHelperFunctions:
         mock_session.add.assert_called_once_with(mock_task)
         mock_session.commit.assert_called_once()
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
-    def test_quick_update_task_not_found(self, mock_engine, mock_session_class):
+    @patch.object(processor_module, "SessionLocal")
+    def test_quick_update_task_not_found(self, mock_session_class):
         """Test task update when task not found."""
         # Arrange
         mock_session = Mock()
@@ -343,9 +326,8 @@ class TestHelperFunctions:
         mock_session.add.assert_not_called()
         mock_session.commit.assert_not_called()
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
-    def test_load_task_success(self, mock_engine, mock_session_class):
+    @patch.object(processor_module, "SessionLocal")
+    def test_load_task_success(self, mock_session_class):
         """Test successful task loading."""
         # Arrange
         mock_session = Mock()
@@ -362,9 +344,8 @@ class TestHelperFunctions:
         # Assert
         assert result == mock_task
 
-    @patch.object(processor_module, "Session")
-    @patch.object(processor_module, "db_engine")
-    def test_load_task_not_found(self, mock_engine, mock_session_class):
+    @patch.object(processor_module, "SessionLocal")
+    def test_load_task_not_found(self, mock_session_class):
         """Test task loading when task not found."""
         # Arrange
         mock_session = Mock()
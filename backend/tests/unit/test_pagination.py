@@ -1,4 +1,5 @@
 import math
+from unittest.mock import patch
 
 from sqlmodel import Field, Session, SQLModel, create_engine, select
 
@@ -73,3 +74,43 @@ class TestPaginate:
             assert [r.name for r in rows] == ["item-21", "item-22"]
         finally:
             session.close()
+
+    def test_partial_page_skips_count_query(self):
+        session = setup_items(23)
+        try:
+            with patch("app.db.pagination._scalar_count") as count:
+                rows, total, _, _ = paginate(
+                    session=session,
+                    base_stmt=select(Item),
+                    page_size=10,
+                    current_page=3,
+                    order_by=Item.id.asc(),
+                )
+            assert len(rows) == 3 and total == 23
+            count.assert_not_called()
+        finally:
+            session.close()
+
+    def test_page_past_end_still_counts(self):
+        session = setup_items(5)
+        try:
+            rows, total, _ps, cp = paginate(
+                session=session,
+                base_stmt=select(Item),
+                page_size=10,
+                current_page=3,
+                order_by=Item.id.asc(),
+            )
+            assert rows == [] and total == 5 and cp == 3
+        finally:
+            session.close()
+
+    def test_empty_result_on_first_page(self):
+        session = setup_items(0)
+        try:
+            rows, total, _, _ = paginate(
+                session=session, base_stmt=select(Item), page_size=10, current_page=1
+            )
+            assert rows == [] and total == 0
+        finally:
+            session.close()
@@ -9,11 +9,13 @@ import hashlib
 import hmac
 from datetime import UTC, datetime, timedelta
 
+import bcrypt
 import jwt
 
 from app.core.security import (
     ALGORITHM,
     create_access_token,
+    dummy_verify_password,
     gen_tile_signature,
     get_password_hash,
     verify_password,
@@ -63,6 +65,18 @@ class TestPasswordHashing:
 
         assert verify_password("", hashed) is False
 
+    def test_dummy_verify_password_always_fails(self):
+        """Test the unknown-user check runs bcrypt but never succeeds."""
+        assert dummy_verify_password("dummy-password") is False
+        assert dummy_verify_password("anything") is False
+
+    def test_verify_password_accepts_existing_2a_hashes(self):
+        """Test hashes stored before the switch (any bcrypt prefix) still verify."""
+        legacy = bcrypt.hashpw(b"stored_password", bcrypt.gensalt(prefix=b"2a")).decode()
+
+        assert verify_password("stored_password", legacy) is True
+        assert verify_password("other", legacy) is False
+
 
 class TestJWTTokenOperations:
     """Test JWT token creation and validation."""
@@ -198,6 +212,16 @@ class TestTileSignatureGeneration:
 
         assert actual_signature == expected_signature
 
+    def test_gen_tile_signature_follows_secret_key(self, mock_settings):
+        """Test the cached keyed HMAC state is per key, so a new key changes signatures."""
+        sig1 = gen_tile_signature(1, 2, 3)
+        mock_settings.SECRET_KEY = "another-secret-key-for-testing-only"
+        sig2 = gen_tile_signature(1, 2, 3)
+
+        expected = hmac.new(mock_settings.SECRET_KEY.encode(), b"1:2:3", hashlib.sha256).digest()
+        assert sig2 == base64.urlsafe_b64encode(expected).rstrip(b"=").decode()
+        assert sig1 != sig2
+
     def test_gen_tile_signature_edge_cases(self, mock_settings):
         """Test tile signature generation with edge case values."""
         # Test with zero values
@@ -39,23 +39,13 @@ class TestDeleteFileOps:
             def __init__(self, code: str = "Boom"):
                 self.response = {"Error": {"Code": code}}
 
-        # First chunk returns some deleted, some errors
-        # Use an iterator to yield different responses per call
-        side_effects = iter(
-            [
-                {"Deleted": [{"Key": "k1"}], "Errors": [{"Key": "k2"}]},
-                # Make subsequent calls raise a ClientError-like so storage.delete_files catches and counts
-                FakeClientError(),
-                FakeClientError(),
-            ]
-        )
-
+        # First chunk returns some deleted, some errors; later chunks raise a
+        # ClientError-like so storage.delete_files catches and counts them.
+        # Chunks run concurrently, so responses are keyed by each chunk's first key.
         def delete_objects_side_effect(*args, **kwargs):
-            res = next(side_effects)
-            # Emulate raising on non-dict entries
-            if not isinstance(res, dict):
-                raise res
-            return res
+            if kwargs["Delete"]["Objects"][0]["Key"] == "k0":
+                return {"Deleted": [{"Key": "k1"}], "Errors": [{"Key": "k2"}]}
+            raise FakeClientError()
 
         s3_mock.delete_objects.side_effect = delete_objects_side_effect
         with (
@@ -69,39 +59,37 @@ class TestDeleteFileOps:
             assert summary["deleted"] == 1
             assert summary["errors"] == 1 + 1000 + 5
 
-
-class TestInitializationHelpers:
-    def test_list_and_download_and_extract(self, tmp_path):
+    def test_delete_files_stops_after_failed_chunk(self):
         import importlib
+        import threading
 
         storage = importlib.import_module("app.core.storage")
 
-        # Fake list returns two tgz keys
-        with patch.object(
-            storage, "_list_tgz_keys_under_prefix", return_value=["inputs/a.tgz", "inputs/b.tgz"]
+        class FakeClientError(Exception):
+            pass
+
+        s3_mock = MagicMock()
+        s3_mock.delete_objects.side_effect = FakeClientError()
+        keys = [f"k{i}" for i in range(3000)]  # 3 chunks
+        with (
+            patch.object(storage, "s3", s3_mock),
+            patch.object(storage, "ClientError", FakeClientError),
+            patch.object(storage, "_DELETE_MAX_WORKERS", 1),
         ):
-            # Patch s3 client methods
-            s3_mock = MagicMock()
-            with patch.object(storage, "s3", s3_mock):
-                # Make download create local dummy files and validate called
-                def fake_download(bucket, key, local):
-                    with open(local, "wb") as f:
-                        f.write(b"dummy")
-
-                s3_mock.download_file.side_effect = fake_download
-
-                # Ensure os.path.exists and os.remove are exercised safely
-                with patch.object(storage.os.path, "exists", return_value=False):
-                    files = storage.download_tgz_archives("inputs", local_cache_dir=str(tmp_path))
-                assert len(files) == 2
-                assert all(p.startswith(str(tmp_path)) for p in files)
-
-        # Now test extraction summarizer — patch the extractor to simulate extracted entries
-        with patch.object(storage, "_safe_extract_tgz", side_effect=[["x/1", "x/2"], ["y/1"]]):
-            summary = storage.extract_archives_to_input_dir(
-                [str(tmp_path / "a.tgz"), str(tmp_path / "b.tgz")], str(tmp_path / "out")
-            )
-            assert summary == {"archives": 2, "extracted_files": 3}
+            summary = storage.delete_files(keys)
+
+        # The first chunk fails, so the others are never sent
+        assert s3_mock.delete_objects.call_count == 1
+        assert summary == {"requested": 3000, "deleted": 0, "errors": 3000}
+
+        # A caller-set stop event cancels the batch before anything is sent
+        s3_mock.reset_mock()
+        stop = threading.Event()
+        stop.set()
+        with patch.object(storage, "s3", s3_mock):
+            summary = storage.delete_files(["a", "b"], stop=stop)
+        s3_mock.delete_objects.assert_not_called()
+        assert summary == {"requested": 2, "deleted": 0, "errors": 2}
 
 
 class TestMoreStorage:
@@ -111,11 +99,45 @@ class TestMoreStorage:
         storage = importlib.import_module("app.core.storage")
         s3_mock = MagicMock()
         s3_mock.generate_presigned_url.return_value = "http://signed"
+        storage._presigned_url.cache_clear()
         with patch.object(storage, "s3", s3_mock):
             url = storage.generate_presigned_url("outputs/1/2/file.tif", expires_in_seconds=123)
             assert url == "http://signed"
             s3_mock.generate_presigned_url.assert_called_once()
 
+    def test_generate_presigned_url_reuses_signature_within_window(self):
+        import importlib
+
+        storage = importlib.import_module("app.core.storage")
+        s3_mock = MagicMock()
+        s3_mock.generate_presigned_url.side_effect = ["http://signed/1", "http://signed/2"]
+        storage._presigned_url.cache_clear()
+        with patch.object(storage, "s3", s3_mock), patch.object(storage.time, "time") as now:
+            now.return_value = 1050.0
+            assert storage.generate_presigned_url("k", expires_in_seconds=600) == "http://signed/1"
+            # Still inside the 150s window: no new signing
+            now.return_value = 1199.0
+            assert storage.generate_presigned_url("k", expires_in_seconds=600) == "http://signed/1"
+            assert s3_mock.generate_presigned_url.call_count == 1
+            # Next window: re-signed so the URL keeps at least 75% of its lifetime
+            now.return_value = 1200.0
+            assert storage.generate_presigned_url("k", expires_in_seconds=600) == "http://signed/2"
+
+    def test_generate_presigned_urls_keeps_order_and_dedupes(self):
+        import importlib
+
+        storage = importlib.import_module("app.core.storage")
+        s3_mock = MagicMock()
+        s3_mock.generate_presigned_url.side_effect = lambda op, Params, ExpiresIn: (
+            f"http://signed/{Params['Key']}?e={ExpiresIn}"
+        )
+        storage._presigned_url.cache_clear()
+        with patch.object(storage, "s3", s3_mock):
+            urls = storage.generate_presigned_urls(["a", "b", "a"], expires_in_seconds=60)
+            assert urls == ["http://signed/a?e=60", "http://signed/b?e=60", "http://signed/a?e=60"]
+            assert s3_mock.generate_presigned_url.call_count == 2
+            assert storage.generate_presigned_urls([]) == []
+
     def test_list_tgz_keys_under_prefix(self):
         import importlib
 
@@ -136,7 +158,7 @@ class TestMoreStorage:
             keys = storage._list_tgz_keys_under_prefix("inputs")
             assert keys == ["inputs/a.tgz", "inputs/b.tgz"]
 
-    def test_safe_extract_tgz_skips_bad_members(self, tmp_path):
+    def test_extract_tgz_from_s3_skips_bad_members(self, tmp_path):
         import importlib
         import io
         import tarfile
@@ -173,29 +195,102 @@ class TestMoreStorage:
             tf.addfile(evil, io.BytesIO(b""))
 
         out_dir = tmp_path / "out"
-        extracted = storage._safe_extract_tgz(str(tar_path), str(out_dir))
+        body = io.BytesIO(tar_path.read_bytes())
+        extracted = storage.extract_tgz_from_s3("inputs/arch.tgz", str(out_dir), body)
         # Should include created directory 'dir/sub' and file 'dir/file.txt', but not symlink or traversal
         assert any(p.endswith("dir/sub") for p in extracted)
         assert any(p.endswith("dir/file.txt") for p in extracted)
+        assert (out_dir / "dir" / "file.txt").read_bytes() == b"hello"
         assert not (out_dir / "evil.txt").exists()
         assert not (out_dir / "dir" / "l").exists()
 
     def test_initialize_input_dir_from_bucket(self, tmp_path):
         import importlib
+        import io
+        import tarfile
 
         storage = importlib.import_module("app.core.storage")
+
+        def tgz_bytes(files: dict[str, bytes]) -> bytes:
+            buf = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+                for name, data in files.items():
+                    info = tarfile.TarInfo(name=name)
+                    info.size = len(data)
+                    tf.addfile(info, io.BytesIO(data))
+            return buf.getvalue()
+
+        objects = {
+            "inputs/a.tgz": tgz_bytes({"a/1.tif": b"one", "a/2.tif": b"two"}),
+            "inputs/b.tgz": tgz_bytes({"b/1.tif": b"three"}),
+        }
+
+        class FakeClientError(Exception):
+            pass
+
+        body_closed = []
+
+        class Body(io.BytesIO):
+            def close(self):
+                body_closed.append(True)
+                super().close()
+
+        def fake_get_object(Bucket, Key):
+            if Key not in objects:
+                raise FakeClientError(Key)
+            return {"Body": Body(objects[Key])}
+
+        s3_mock = MagicMock()
+        s3_mock.get_object.side_effect = fake_get_object
+        input_dir = tmp_path / "input"
         with (
             patch.object(
                 storage,
-                "download_tgz_archives",
-                return_value=[str(tmp_path / "a.tgz"), str(tmp_path / "b.tgz")],
+                "_list_tgz_keys_under_prefix",
+                return_value=["inputs/a.tgz", "inputs/b.tgz", "inputs/gone.tgz"],
             ),
+            patch.object(storage, "s3", s3_mock),
+            patch.object(storage, "ClientError", FakeClientError),
+            patch.object(storage.settings, "INPUT_DATA_DIR", input_dir),
+        ):
+            summary = storage.initialize_input_dir_from_bucket()
+
+        # Archives are streamed straight into the input dir; the missing one is skipped
+        assert summary == {"archives": 3, "downloaded": 2, "extracted_files": 3}
+        assert (input_dir / "a" / "2.tif").read_bytes() == b"two"
+        assert (input_dir / "b" / "1.tif").read_bytes() == b"three"
+        assert body_closed == [True, True]
+
+    def test_initialize_input_dir_later_key_wins(self, tmp_path):
+        import importlib
+        import io
+        import tarfile
+
+        storage = importlib.import_module("app.core.storage")
+
+        def tgz_bytes(data: bytes) -> bytes:
+            buf = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+                info = tarfile.TarInfo(name="shared/layer.tif")
+                info.size = len(data)
+                tf.addfile(info, io.BytesIO(data))
+            return buf.getvalue()
+
+        objects = {f"inputs/{n}.tgz": tgz_bytes(n.encode()) for n in ("a", "b", "c")}
+        s3_mock = MagicMock()
+        s3_mock.get_object.side_effect = lambda Bucket, Key: {"Body": io.BytesIO(objects[Key])}
+        input_dir = tmp_path / "input"
+        with (
             patch.object(
                 storage,
-                "extract_archives_to_input_dir",
-                return_value={"archives": 2, "extracted_files": 3},
+                "_list_tgz_keys_under_prefix",
+                return_value=["inputs/c.tgz", "inputs/a.tgz", "inputs/b.tgz"],
             ),
-            patch.object(storage.settings, "INPUT_DATA_DIR", tmp_path),
+            patch.object(storage, "s3", s3_mock),
+            patch.object(storage.settings, "INPUT_DATA_DIR", input_dir),
         ):
             summary = storage.initialize_input_dir_from_bucket()
-            assert summary == {"downloaded": 2, "archives": 2, "extracted_files": 3}
+
+        # Extracted in key order, one at a time: the last key's copy of a shared member wins
+        assert summary == {"archives": 3, "downloaded": 3, "extracted_files": 3}
+        assert (input_dir / "shared" / "layer.tif").read_bytes() == b"c"
@@ -32,6 +32,10 @@ CREATE TABLE IF NOT EXISTS t_map_task (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT 'Task creation timestamp',
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Last modification timestamp'
 );
+-- Task listings are filtered by owner/status and always ordered by newest first
+CREATE INDEX idx_map_task_user_time ON t_map_task(user_id, created_at);
+CREATE INDEX idx_map_task_status_time ON t_map_task(status, created_at);
+CREATE INDEX idx_map_task_time ON t_map_task(created_at);
 
 -- MapTaskFiles table
 CREATE TABLE IF NOT EXISTS t_map_task_files (
@@ -43,6 +47,8 @@ CREATE TABLE IF NOT EXISTS t_map_task_files (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT 'File upload timestamp',
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Last modification timestamp'
 );
+-- File lookups always pin the task (alone, with its owner, or with file_type)
+CREATE INDEX idx_map_task_files_task_user ON t_map_task_files(map_task_id, user_id);
 
 -- MapTaskProgress table (append-only progress events; no foreign keys by project policy)
 CREATE TABLE IF NOT EXISTS t_map_task_progress (